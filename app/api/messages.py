@@ -1,9 +1,12 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.models.message import MessageCreate, MessageResponse
+from app.models.message import MessageCreate, MessageResponse, MessagesQuery, MESSAGE_FIELDS, METADATA_FIELDS
+from app.repository.storage import MessageStorage
 from app.services.message_service import MessageService
 from app.db.database import get_db
 from app.core.errors import ApiError, ErrorResponse, ErrorDetail
@@ -23,18 +26,36 @@ class MessagesListResponse(BaseModel):
     pagination: dict
 
 
+class ProjectedMessagesListResponse(BaseModel):
+    """Respuesta con `fields`: cada objeto contiene solo los campos pedidos."""
+    status: str = "success"
+    data: List[Dict[str, Any]]
+    pagination: dict
+
+
+class ColumnarMessagesListResponse(BaseModel):
+    """Respuesta con format=columnar: una lista de valores por campo."""
+    status: str = "success"
+    data: Dict[str, List[Any]]
+    pagination: dict
+
+
+class SessionsMessagesResponse(BaseModel):
+    status: str = "success"
+    data: Dict[str, List[MessageResponse]]
+
+
 @router.post("/messages", response_model=SuccessResponse)
-async def create_message(
+def create_message(
     message: MessageCreate,
-    db: Session = Depends(get_db)
+    db: Union[Session, MessageStorage] = Depends(get_db)
 ):
+    """
+    Crea un nuevo mensaje.
 
-"""
-Crea un nuevo mensaje.
-
-Valida el formato del mensaje, procesa el contenido y lo almacena en la base de datos.
-Devuelve el mensaje procesado con metadatos.
-""""
+    Valida el formato del mensaje, procesa el contenido y lo almacena en la base de datos.
+    Devuelve el mensaje procesado con metadatos.
+    """
     try:
         service = MessageService(db)
         processed_message = service.process_message(message)
@@ -67,27 +88,55 @@ Devuelve el mensaje procesado con metadatos.
         )
 
 
-@router.get("/messages/{session_id}", response_model=MessagesListResponse)
-async def get_messages(
+@router.get(
+    "/messages/{session_id}",
+    response_model=Union[MessagesListResponse, ProjectedMessagesListResponse, ColumnarMessagesListResponse]
+)
+def get_messages(
     session_id: str,
     sender: Optional[str] = Query(None, description="Filter by sender: 'user' or 'system'"),
     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of messages per page"),
     offset: int = Query(0, ge=0, description="Number of messages to skip"),
-    db: Session = Depends(get_db)
+    include_archived: bool = Query(False, description="Also read messages moved to the archive"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. 'message_id,sender,timestamp'"),
+    response_format: str = Query("objects", alias="format", pattern="^(objects|columnar)$", description="'objects' or 'columnar'"),
+    db: Union[Session, MessageStorage] = Depends(get_db)
 ):
-    
-"""
-Obtener mensajes de una sesión específica.
-
-Admite paginación y filtrado por remitente.
-"""
+    """
+    Obtener mensajes de una sesión específica.
+
+    Admite paginación y filtrado por remitente. Con include_archived=true
+    también devuelve los mensajes de sesiones archivadas por la política de retención.
+    Con `fields` solo se consultan y devuelven esos campos; con format=columnar
+    `data` contiene una lista de valores por campo en lugar de una lista de objetos.
+    """
     try:
         service = MessageService(db)
+
+        if fields is not None or response_format == "columnar":
+            requested = [f.strip() for f in fields.split(",") if f.strip()] if fields is not None else MESSAGE_FIELDS
+            columns, rows = service.get_message_fields_by_session(
+                session_id=session_id,
+                fields=requested,
+                sender=sender,
+                limit=limit,
+                offset=offset,
+                include_archived=include_archived
+            )
+            data = _to_columnar(columns, rows) if response_format == "columnar" else _to_objects(columns, rows)
+            # Forma de ProjectedMessagesListResponse o ColumnarMessagesListResponse; se omite la revalidación
+            return JSONResponse({
+                "status": "success",
+                "data": data,
+                "pagination": {"limit": limit, "offset": offset, "total": len(rows)}
+            })
+
         messages = service.get_messages_by_session(
             session_id=session_id,
             sender=sender,
             limit=limit,
-            offset=offset
+            offset=offset,
+            include_archived=include_archived
         )
 
         pagination = {
@@ -101,6 +150,82 @@ Admite paginación y filtrado por remitente.
             pagination=pagination
         )
 
+    except ApiError as e:
+        error_response = ErrorResponse(
+            error=ErrorDetail(
+                code=e.code,
+                message=e.message,
+                details=e.details
+            ).dict()
+        )
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=error_response.dict()
+        )
+    except Exception as e:
+        error_response = ErrorResponse(
+            error=ErrorDetail(
+                code="INTERNAL_ERROR",
+                message="An internal server error occurred",
+                details=str(e)
+            ).dict()
+        )
+        raise HTTPException(
+            status_code=500,
+            detail=error_response.dict()
+        )
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _to_objects(columns: List[str], rows: List[tuple]) -> List[dict]:
+    """
+    Una lista de objetos con los campos pedidos; los de metadatos van anidados en "metadata".
+    """
+    top_level = [(i, column) for i, column in enumerate(columns) if column not in METADATA_FIELDS]
+    nested = [(i, column) for i, column in enumerate(columns) if column in METADATA_FIELDS]
+    data = []
+    for row in rows:
+        item = {column: _json_value(row[i]) for i, column in top_level}
+        if nested:
+            item["metadata"] = {column: _json_value(row[i]) for i, column in nested}
+        data.append(item)
+    return data
+
+
+def _to_columnar(columns: List[str], rows: List[tuple]) -> Dict[str, list]:
+    """
+    Una lista de valores por campo, en el mismo orden de los mensajes.
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return {
+        column: [_json_value(v) for v in column_values] if column in ("timestamp", "processed_at") else list(column_values)
+        for column, column_values in zip(columns, values)
+    }
+
+
+@router.post("/messages/query", response_model=SessionsMessagesResponse)
+def query_messages(
+    query: MessagesQuery,
+    db: Union[Session, MessageStorage] = Depends(get_db)
+):
+    """
+    Obtener los últimos mensajes de varias sesiones en una sola petición.
+
+    Devuelve hasta `limit` mensajes por sesión, agrupados por session_id.
+    """
+    try:
+        service = MessageService(db)
+        messages = service.get_latest_messages_by_sessions(
+            session_ids=query.session_ids,
+            sender=query.sender.value if query.sender else None,
+            limit=query.limit
+        )
+
+        return SessionsMessagesResponse(data=messages)
+
     except ApiError as e:
         error_response = ErrorResponse(
             error=ErrorDetail(
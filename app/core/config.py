@@ -13,4 +13,33 @@ MAX_PAGE_SIZE = 100
 # Configuración de la API
 API_VERSION = "1.0.0"
 API_TITLE = "Message Processing API"
-API_DESCRIPTION = "A simple API for processing chat messages"
\ No newline at end of file
+API_DESCRIPTION = "A simple API for processing chat messages"
+
+# Configuración de retención y archivado
+# Sesiones sin actividad por más de RETENTION_DAYS días se mueven al archivo.
+# Un valor de 0 desactiva el archivador en segundo plano.
+RETENTION_DAYS = 0
+ARCHIVE_DIR = "./archive"
+ARCHIVE_BATCH_SIZE = 100
+ARCHIVE_INTERVAL_SECONDS = 3600
+VACUUM_PAGES_PER_RUN = 1000
+
+# Configuración del procesamiento por lotes
+# Lotes con al menos BATCH_PARALLEL_MIN_SIZE mensajes se reparten en trozos de
+# BATCH_CHUNK_SIZE cuando MessageService.process_batch recibe un executor.
+BATCH_PARALLEL_MIN_SIZE = 5000
+BATCH_CHUNK_SIZE = 1000
+# Máximo de parámetros por cláusula IN en consultas de SQLite
+SQL_IN_CHUNK_SIZE = 500
+
+# Configuración de la consulta de múltiples sesiones
+MAX_QUERY_SESSIONS = 100
+
+# Configuración del backend de almacenamiento: "sqlalchemy" o "memory"
+STORAGE_BACKEND = "sqlalchemy"
+# Directorio del snapshot y del log del motor en memoria (None = sin persistencia)
+MEMORY_STORAGE_DIR = None
+# Operaciones registradas en el log antes de escribir un snapshot nuevo
+MEMORY_SNAPSHOT_EVERY = 10000
+# Llamar a fsync después de cada escritura en el log
+MEMORY_FSYNC = False
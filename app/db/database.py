@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
+from app.core.config import STORAGE_BACKEND, MEMORY_STORAGE_DIR
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./messages.db"
 
@@ -10,17 +12,56 @@ engine = create_engine(
     connect_args={"check_same_thread": False}
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    """
+    Habilitar auto_vacuum incremental para que el archivador pueda devolver
+    páginas libres al sistema de archivos con PRAGMA incremental_vacuum.
+    Solo tiene efecto en bases nuevas; una base existente necesita un VACUUM completo.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+_memory_storage = None
+_memory_storage_lock = threading.Lock()
+
+
+def get_memory_storage():
+    """
+    Motor en memoria compartido por todo el proceso (STORAGE_BACKEND = "memory").
+    """
+    global _memory_storage
+    if _memory_storage is None:
+        # Los handlers corren en el threadpool: solo un hilo debe crear el motor
+        with _memory_storage_lock:
+            if _memory_storage is None:
+                from app.repository.memory_storage import InMemoryMessageStorage
+                _memory_storage = InMemoryMessageStorage(MEMORY_STORAGE_DIR)
+    return _memory_storage
+
+
+def open_db():
+    """
+    Abrir el almacenamiento configurado: una sesión de SQLAlchemy o el motor en memoria.
+    """
+    if STORAGE_BACKEND == "memory":
+        return get_memory_storage()
+    return SessionLocal()
+
+
 def get_db():
     """
-    
-Dependencia de la base de datos para obtener una sesión de base de datos.
+    Dependencia de la base de datos para obtener una sesión de base de datos.
     """
-    db = SessionLocal()
+    db = open_db()
     try:
         yield db
     finally:
@@ -31,6 +72,11 @@ def create_tables():
     """
     Crear todas las tablas de la base de datos.
     """
+    if STORAGE_BACKEND == "memory":
+        return
     # Import here to avoid circular imports
     from app.models.message import Message, Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all no agrega índices nuevos a tablas existentes
+    for index in Message.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
\ No newline at end of file
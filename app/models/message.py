@@ -1,36 +1,41 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
-from sqlalchemy import Column, String, DateTime, Integer, Text, TypeDecorator
+from sqlalchemy import Column, String, DateTime, Index, Integer, Text, TypeDecorator
 from sqlalchemy.orm import declarative_base
+from app.core.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 Base = declarative_base()
 
+def to_bogota_naive(value):
+    """Convierte una fecha (o cadena ISO) con zona horaria a hora de Bogotá sin zona horaria."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            if value.endswith('Z'):
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            else:
+                value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            bogota_dt = value.astimezone(ZoneInfo("America/Bogota")).replace(tzinfo=None)
+            return bogota_dt
+        else:
+            return value
+    return value
+
 class BogotaDateTime(TypeDecorator):
     """Un tipo de columna DateTime que convierte objetos de fecha y hora que tienen en cuenta la zona horaria en fecha y hora  para compatibilidad con SQLite."""
     impl = DateTime
     cache_ok = True
 
     def process_bind_param(self, value, dialect):
-        if value is None:
-            return None
-        if isinstance(value, str):
-            try:
-                if value.endswith('Z'):
-                    value = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                else:
-                    value = datetime.fromisoformat(value)
-            except ValueError:
-                return value
-        if isinstance(value, datetime):
-            if value.tzinfo is not None:
-                bogota_dt = value.astimezone(ZoneInfo("America/Bogota")).replace(tzinfo=None)
-                return bogota_dt
-            else:
-                return value
-        return value
+        return to_bogota_naive(value)
 
     def process_result_value(self, value, dialect):
         return value
@@ -75,6 +80,15 @@ class MessageCreate(BaseModel):
 class MessageResponse(MessageCreate):
     metadata: MessageMetadata
 
+# Campos seleccionables con el parámetro `fields`; "metadata" equivale a sus tres subcampos
+METADATA_FIELDS = ["word_count", "character_count", "processed_at"]
+MESSAGE_FIELDS = ["message_id", "session_id", "content", "timestamp", "sender"] + METADATA_FIELDS
+
+class MessagesQuery(BaseModel):
+    session_ids: List[str] = Field(..., description="Session identifiers to fetch")
+    sender: Optional[SenderType] = Field(None, description="Filter by sender: 'user' or 'system'")
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Number of latest messages per session")
+
 class Message(Base):
     __tablename__ = "messages"
     id = Column(Integer, primary_key=True, index=True)
@@ -85,4 +99,17 @@ class Message(Base):
     sender = Column(String, nullable=False)
     word_count = Column(Integer, nullable=False)
     character_count = Column(Integer, nullable=False)
-    processed_at = Column(BogotaDateTime, nullable=False)
\ No newline at end of file
+    processed_at = Column(BogotaDateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_messages_session_id_timestamp", "session_id", "timestamp"),
+    )
+
+class ArchivedSession(Base):
+    """Índice de sesiones archivadas y la partición donde quedaron sus mensajes."""
+    __tablename__ = "archived_sessions"
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, index=True, nullable=False)
+    partition = Column(String, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    archived_at = Column(BogotaDateTime, nullable=False)
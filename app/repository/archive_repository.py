@@ -0,0 +1,86 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+from typing import Iterable, List
+
+from app.models.message import Message
+
+
+class ArchiveRepository:
+    """
+    Almacén de mensajes archivados en archivos NDJSON comprimidos con gzip,
+    particionados por fecha: <base_dir>/AAAA/MM/AAAA-MM-DD.ndjson.gz
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def partition_for(self, day: date) -> str:
+        """
+        Nombre de la partición correspondiente a una fecha.
+        """
+        return day.isoformat()
+
+    def write_partition(self, partition: str, messages: Iterable[Message]) -> int:
+        """
+        Añadir mensajes a una partición. Cada llamada agrega un nuevo miembro gzip
+        al final del archivo, por lo que las escrituras previas no se reescriben.
+        """
+        path = self._path(partition)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        count = 0
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                for message in messages:
+                    gz.write(json.dumps(self._to_record(message), ensure_ascii=False).encode("utf-8"))
+                    gz.write(b"\n")
+                    count += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+        return count
+
+    def read_session(self, partitions: List[str], session_id: str) -> List[dict]:
+        """
+        Leer los mensajes archivados de una sesión en las particiones indicadas.
+        Los duplicados (por ejemplo, de una ejecución interrumpida) se descartan.
+        Cada partición se descomprime completa; solo se parsean las líneas que
+        contienen el session_id.
+        """
+        # Filtro barato antes de json.loads: la partición incluye todas las sesiones del día
+        needle = json.dumps(session_id, ensure_ascii=False)
+        records = {}
+        for partition in partitions:
+            path = self._path(partition)
+            if not os.path.exists(path):
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if needle not in line:
+                        continue
+                    record = json.loads(line)
+                    if record["session_id"] == session_id:
+                        records[record["message_id"]] = record
+        return list(records.values())
+
+    def _path(self, partition: str) -> str:
+        year, month, _ = partition.split("-")
+        return os.path.join(self.base_dir, year, month, f"{partition}.ndjson.gz")
+
+    def _to_record(self, message: Message) -> dict:
+        return {
+            "message_id": message.message_id,
+            "session_id": message.session_id,
+            "content": message.content,
+            "timestamp": _isoformat(message.timestamp),
+            "sender": message.sender,
+            "word_count": message.word_count,
+            "character_count": message.character_count,
+            "processed_at": _isoformat(message.processed_at),
+        }
+
+
+def _isoformat(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
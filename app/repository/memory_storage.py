@@ -0,0 +1,420 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from app.models.message import MessageCreate, to_bogota_naive
+from app.core.config import MEMORY_FSYNC, MEMORY_SNAPSHOT_EVERY
+from app.core.errors import DuplicateError
+from app.repository.storage import MessageStorage
+
+logger = logging.getLogger(__name__)
+
+
+class StoredMessage:
+    """Mensaje almacenado en memoria, con los mismos atributos que Message."""
+    __slots__ = (
+        "message_id", "session_id", "content", "timestamp", "sender",
+        "word_count", "character_count", "processed_at",
+    )
+
+    def __init__(self, message_id, session_id, content, timestamp, sender, word_count, character_count, processed_at):
+        self.message_id = message_id
+        self.session_id = session_id
+        self.content = content
+        self.timestamp = timestamp
+        self.sender = sender
+        self.word_count = word_count
+        self.character_count = character_count
+        self.processed_at = processed_at
+
+    def to_record(self) -> dict:
+        return {
+            "message_id": self.message_id,
+            "session_id": self.session_id,
+            "content": self.content,
+            "timestamp": self.timestamp.isoformat(),
+            "sender": self.sender,
+            "word_count": self.word_count,
+            "character_count": self.character_count,
+            "processed_at": self.processed_at.isoformat(),
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "StoredMessage":
+        return cls(
+            record["message_id"],
+            record["session_id"],
+            record["content"],
+            datetime.fromisoformat(record["timestamp"]),
+            record["sender"],
+            record["word_count"],
+            record["character_count"],
+            datetime.fromisoformat(record["processed_at"]),
+        )
+
+
+class _SessionMessages:
+    """Mensajes de una sesión ordenados por timestamp ascendente, con las claves en paralelo."""
+    __slots__ = ("timestamps", "messages")
+
+    def __init__(self):
+        self.timestamps: List[datetime] = []
+        self.messages: List[StoredMessage] = []
+
+    def insert(self, message: StoredMessage) -> None:
+        index = bisect_right(self.timestamps, message.timestamp)
+        self.timestamps.insert(index, message.timestamp)
+        self.messages.insert(index, message)
+
+    def latest(self, sender: Optional[str], limit: int, offset: int = 0) -> List[StoredMessage]:
+        if sender is None:
+            end = len(self.messages) - offset
+            if end <= 0:
+                return []
+            return self.messages[max(0, end - limit):end][::-1]
+        matching = (m for m in reversed(self.messages) if m.sender == sender)
+        return list(islice(matching, offset, offset + limit))
+
+
+class InMemoryMessageStorage(MessageStorage):
+    """
+    Backend de almacenamiento en memoria del proceso.
+
+    Cada sesión guarda sus mensajes ordenados por timestamp y un índice hash por
+    message_id permite búsquedas directas. Con `directory`, cada escritura se añade a
+    un log (log.ndjson). Cada `snapshot_every` operaciones el log se sella
+    (log.sealed.ndjson) y un hilo en segundo plano vuelca el estado en snapshot.ndjson
+    sin bloquear las lecturas; al terminar, el segmento sellado se borra. Al iniciar se
+    carga el snapshot y se reproducen el segmento sellado y el log, en ese orden.
+    """
+
+    SNAPSHOT_FILE = "snapshot.ndjson"
+    LOG_FILE = "log.ndjson"
+    SEALED_LOG_FILE = "log.sealed.ndjson"
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        snapshot_every: int = MEMORY_SNAPSHOT_EVERY,
+        fsync: bool = MEMORY_FSYNC
+    ):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        # Solo un snapshot a la vez; se toma sin retener _lock mientras se escribe
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._sessions: Dict[str, _SessionMessages] = {}
+        self._by_id: Dict[str, StoredMessage] = {}
+        self._archived: Dict[str, List[str]] = {}
+        self._log = None
+        self._log_ops = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            torn_log = self._load()
+            self._log = open(self._path(self.LOG_FILE), "a", encoding="utf-8")
+            if torn_log or os.path.exists(self._path(self.SEALED_LOG_FILE)):
+                # No seguir escribiendo después de una línea incompleta ni dejar
+                # pendiente el segmento de un snapshot interrumpido
+                self.snapshot()
+
+    def create_message(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> StoredMessage:
+        with self._lock:
+            if message_data.message_id in self._by_id:
+                raise DuplicateError(f"Message with ID {message_data.message_id} already exists")
+            message = self._build(message_data, word_count, character_count, processed_at)
+            self._insert(message)
+            self._append({"op": "create", "messages": [message.to_record()]})
+            return message
+
+    def create_messages(
+        self,
+        messages: List[MessageCreate],
+        word_counts: List[int],
+        character_counts: List[int],
+        processed_at
+    ) -> List[Optional[StoredMessage]]:
+        with self._lock:
+            results: List[Optional[StoredMessage]] = []
+            for message_data, word_count, character_count in zip(messages, word_counts, character_counts):
+                if message_data.message_id in self._by_id:
+                    results.append(None)
+                    continue
+                message = self._build(message_data, word_count, character_count, processed_at)
+                self._insert(message)
+                results.append(message)
+            created = [m.to_record() for m in results if m is not None]
+            if created:
+                self._append({"op": "create", "messages": created})
+            return results
+
+    def get_messages_by_session(
+        self,
+        session_id: str,
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[StoredMessage]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.latest(sender, limit, offset) if session else []
+
+    def get_message_columns_by_session(
+        self,
+        session_id: str,
+        columns: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[tuple]:
+        messages = self.get_messages_by_session(session_id, sender, limit, offset)
+        return [tuple(getattr(message, column) for column in columns) for message in messages]
+
+    def get_latest_messages_by_sessions(
+        self,
+        session_ids: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, List[StoredMessage]]:
+        with self._lock:
+            return {
+                session_id: self.get_messages_by_session(session_id, sender, limit)
+                for session_id in session_ids
+            }
+
+    def get_message_by_id(self, message_id: str) -> Optional[StoredMessage]:
+        return self._by_id.get(message_id)
+
+    def message_exists(self, message_id: str) -> bool:
+        return message_id in self._by_id
+
+    def get_expired_session_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        with self._lock:
+            expired = sorted(
+                session_id for session_id, session in self._sessions.items()
+                if session.timestamps[-1] < cutoff
+            )
+            return expired[:limit]
+
+    def get_all_messages_by_session_ids(self, session_ids: List[str]) -> List[StoredMessage]:
+        with self._lock:
+            messages = []
+            for session_id in sorted(set(session_ids)):
+                session = self._sessions.get(session_id)
+                if session:
+                    messages.extend(session.messages)
+            return messages
+
+    def archive_sessions(self, entries: List[dict], archived_at: datetime) -> int:
+        with self._lock:
+            deleted = self._apply_archive(entries)
+            self._append({"op": "archive", "entries": entries})
+            return deleted
+
+    def get_archive_partitions(self, session_id: str) -> List[str]:
+        with self._lock:
+            return list(self._archived.get(session_id, []))
+
+    def snapshot(self) -> None:
+        """
+        Volcar el estado completo en el snapshot y vaciar el log, esperando a que
+        termine. Las lecturas y escrituras solo se detienen mientras se sella el log.
+        """
+        if self.directory is None:
+            return
+        with self._snapshot_lock:
+            with self._lock:
+                if self._log is None:
+                    return
+                state = self._seal_log()
+            self._write_snapshot(*state)
+
+    def wait_for_snapshot(self) -> None:
+        """
+        Esperar a que termine el snapshot en segundo plano, si hay uno en curso.
+        """
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    def close(self) -> None:
+        # El motor vive durante todo el proceso; cada petición no libera nada
+        pass
+
+    def shutdown(self) -> None:
+        """
+        Escribir un snapshot final y cerrar el log.
+        """
+        self.wait_for_snapshot()
+        self.snapshot()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _build(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> StoredMessage:
+        sender = message_data.sender
+        return StoredMessage(
+            message_data.message_id,
+            message_data.session_id,
+            message_data.content,
+            to_bogota_naive(message_data.timestamp),
+            getattr(sender, "value", sender),
+            word_count,
+            character_count,
+            to_bogota_naive(processed_at),
+        )
+
+    def _insert(self, message: StoredMessage) -> None:
+        session = self._sessions.get(message.session_id)
+        if session is None:
+            session = self._sessions[message.session_id] = _SessionMessages()
+        session.insert(message)
+        self._by_id[message.message_id] = message
+
+    def _apply_archive(self, entries: Iterable[dict]) -> int:
+        deleted = 0
+        for entry in entries:
+            session_id = entry["session_id"]
+            partitions = self._archived.setdefault(session_id, [])
+            if entry["partition"] not in partitions:
+                partitions.append(entry["partition"])
+            session = self._sessions.get(session_id)
+            if session is None:
+                continue
+            # Solo los mensajes escritos en el archivo; los posteriores se conservan
+            archived_ids = set(entry["message_ids"])
+            kept = [m for m in session.messages if m.message_id not in archived_ids]
+            for message in session.messages:
+                if message.message_id in archived_ids:
+                    del self._by_id[message.message_id]
+            deleted += len(session.messages) - len(kept)
+            if kept:
+                session.messages = kept
+                session.timestamps = [m.timestamp for m in kept]
+            else:
+                del self._sessions[session_id]
+        return deleted
+
+    def _append(self, operation: dict) -> None:
+        if self._log is None:
+            return
+        self._log.write(json.dumps(operation, ensure_ascii=False) + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_ops += 1
+        if self._log_ops >= self.snapshot_every:
+            self._snapshot_in_background()
+
+    def _snapshot_in_background(self) -> None:
+        """
+        Sellar el log y escribir el snapshot en otro hilo. Se llama con _lock tomado;
+        si ya hay un snapshot en curso, se reintenta en la siguiente escritura.
+        """
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            state = self._seal_log()
+            self._snapshot_thread = threading.Thread(
+                target=self._finish_snapshot, args=state, name="memory-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+        except BaseException:
+            self._snapshot_lock.release()
+            raise
+
+    def _finish_snapshot(self, messages: List[StoredMessage], archived: Dict[str, List[str]]) -> None:
+        try:
+            self._write_snapshot(messages, archived)
+        except Exception:
+            # El segmento sellado se conserva y se incluye en el siguiente snapshot
+            logger.exception("Memory storage snapshot failed")
+        finally:
+            self._snapshot_lock.release()
+
+    def _seal_log(self):
+        """
+        Mover el log a un segmento sellado, abrir uno nuevo y capturar el estado actual.
+        Se llama con _lock tomado; solo copia referencias, sin serializar.
+        """
+        self._log.close()
+        log_path = self._path(self.LOG_FILE)
+        sealed_path = self._path(self.SEALED_LOG_FILE)
+        if os.path.exists(sealed_path):
+            # Un snapshot anterior falló: su segmento todavía es necesario
+            with open(sealed_path, "a", encoding="utf-8") as sealed, open(log_path, encoding="utf-8") as log:
+                shutil.copyfileobj(log, sealed)
+            os.remove(log_path)
+        else:
+            os.replace(log_path, sealed_path)
+        self._log = open(log_path, "a", encoding="utf-8")
+        self._log_ops = 0
+        # Los StoredMessage no se modifican después de insertarse; basta copiar las listas
+        messages = [message for session in self._sessions.values() for message in session.messages]
+        archived = {session_id: list(partitions) for session_id, partitions in self._archived.items()}
+        return messages, archived
+
+    def _write_snapshot(self, messages: List[StoredMessage], archived: Dict[str, List[str]]) -> None:
+        tmp_path = self._path(self.SNAPSHOT_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for message in messages:
+                fh.write(json.dumps({"type": "message", **message.to_record()}, ensure_ascii=False) + "\n")
+            for session_id, partitions in archived.items():
+                for partition in partitions:
+                    fh.write(json.dumps({"type": "archived", "session_id": session_id, "partition": partition}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self._path(self.SNAPSHOT_FILE))
+        # Si el proceso termina antes de borrar el segmento, reproducirlo sobre el snapshot es idempotente
+        os.remove(self._path(self.SEALED_LOG_FILE))
+
+    def _load(self) -> bool:
+        """
+        Cargar el snapshot y reproducir el log. Devuelve True si el log terminaba
+        en una línea incompleta por una escritura interrumpida.
+        """
+        snapshot_path = self._path(self.SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as fh:
+                for line in fh:
+                    record = json.loads(line)
+                    if record.pop("type") == "message":
+                        self._insert(StoredMessage.from_record(record))
+                    else:
+                        self._archived.setdefault(record["session_id"], []).append(record["partition"])
+
+        # El segmento sellado es anterior al log; una línea incompleta solo puede
+        # venir de una copia interrumpida, y esas operaciones siguen en el log
+        self._replay(self._path(self.SEALED_LOG_FILE))
+        return self._replay(self._path(self.LOG_FILE))
+
+    def _replay(self, path: str) -> bool:
+        """
+        Reproducir un log. Devuelve True si terminaba en una línea incompleta.
+        """
+        if not os.path.exists(path):
+            return False
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.endswith("\n"):
+                    return True
+                operation = json.loads(line)
+                if operation["op"] == "create":
+                    for record in operation["messages"]:
+                        if record["message_id"] not in self._by_id:
+                            self._insert(StoredMessage.from_record(record))
+                elif operation["op"] == "archive":
+                    self._apply_archive(operation["entries"])
+        return False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
@@ -1,63 +1,77 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from app.models.message import Message, MessageCreate
-from app.core.errors import DuplicateError, NotFoundError
+from app.models.message import MessageCreate
+from app.repository.storage import MessageStorage
+from app.repository.sqlalchemy_storage import SQLAlchemyMessageStorage
 
 
 class MessageRepository:
-    def __init__(self, db: Session):
+    """
+    Acceso a los mensajes a través de un backend de almacenamiento. Acepta una
+    sesión de SQLAlchemy (se usa SQLAlchemyMessageStorage) o cualquier MessageStorage.
+    """
+
+    def __init__(self, db: Union[Session, MessageStorage]):
         self.db = db
+        self.backend = db if isinstance(db, MessageStorage) else SQLAlchemyMessageStorage(db)
+
+    def create_message(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> Any:
+        return self.backend.create_message(message_data, word_count, character_count, processed_at)
 
-    def create_message(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> Message:
-        """
-      crear un nuevo mensaje en la base de datos.
-        """
-        try:
-            db_message = Message(
-                message_id=message_data.message_id,
-                session_id=message_data.session_id,
-                content=message_data.content,
-                timestamp=message_data.timestamp,
-                sender=message_data.sender,
-                word_count=word_count,
-                character_count=character_count,
-                processed_at=processed_at
-            )
-            self.db.add(db_message)
-            self.db.commit()
-            self.db.refresh(db_message)
-            return db_message
-        except IntegrityError:
-            self.db.rollback()
-            raise DuplicateError(f"Message with ID {message_data.message_id} already exists")
+    def create_messages(
+        self,
+        messages: List[MessageCreate],
+        word_counts: List[int],
+        character_counts: List[int],
+        processed_at
+    ) -> List[Optional[Any]]:
+        return self.backend.create_messages(messages, word_counts, character_counts, processed_at)
 
     def get_messages_by_session(
-        self, 
-        session_id: str, 
+        self,
+        session_id: str,
         sender: Optional[str] = None,
-        limit: int = 10, 
+        limit: int = 10,
         offset: int = 0
-    ) -> List[Message]:
-        """
-        Obtener mensajes por ID de sesión con filtrado y paginación opcionales.
-        """
-        query = self.db.query(Message).filter(Message.session_id == session_id)
+    ) -> List[Any]:
+        return self.backend.get_messages_by_session(session_id, sender, limit, offset)
 
-        if sender:
-            query = query.filter(Message.sender == sender)
+    def get_message_columns_by_session(
+        self,
+        session_id: str,
+        columns: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[tuple]:
+        return self.backend.get_message_columns_by_session(session_id, columns, sender, limit, offset)
 
-        messages = query.order_by(Message.timestamp.desc()).offset(offset).limit(limit).all()
-        return messages
+    def get_latest_messages_by_sessions(
+        self,
+        session_ids: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, List[Any]]:
+        return self.backend.get_latest_messages_by_sessions(session_ids, sender, limit)
 
-    def get_message_by_id(self, message_id: str) -> Optional[Message]:
-        """
-        Obtener un solo mensaje por su ID.
-        """
-        return self.db.query(Message).filter(Message.message_id == message_id).first()
+    def get_message_by_id(self, message_id: str) -> Optional[Any]:
+        return self.backend.get_message_by_id(message_id)
 
     def message_exists(self, message_id: str) -> bool:
-        """
-        Verificar si un mensaje existe por su ID.
-        """
-        return self.db.query(Message).filter(Message.message_id == message_id).first() is not None
\ No newline at end of file
+        return self.backend.message_exists(message_id)
+
+    def get_expired_session_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        return self.backend.get_expired_session_ids(cutoff, limit)
+
+    def get_all_messages_by_session_ids(self, session_ids: List[str]) -> List[Any]:
+        return self.backend.get_all_messages_by_session_ids(session_ids)
+
+    def archive_sessions(self, entries: List[dict], archived_at: datetime) -> int:
+        return self.backend.archive_sessions(entries, archived_at)
+
+    def get_archive_partitions(self, session_id: str) -> List[str]:
+        return self.backend.get_archive_partitions(session_id)
+
+    def incremental_vacuum(self, pages: int) -> None:
+        self.backend.incremental_vacuum(pages)
@@ -0,0 +1,269 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models.message import Message, MessageCreate, ArchivedSession
+from app.core.errors import DuplicateError, NotFoundError
+from app.core.config import SQL_IN_CHUNK_SIZE
+from app.repository.storage import MessageStorage
+
+
+class SQLAlchemyMessageStorage(MessageStorage):
+    """
+    Backend de almacenamiento sobre una sesión de SQLAlchemy.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_message(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> Message:
+        """
+        crear un nuevo mensaje en la base de datos.
+        """
+        try:
+            db_message = Message(
+                message_id=message_data.message_id,
+                session_id=message_data.session_id,
+                content=message_data.content,
+                timestamp=message_data.timestamp,
+                sender=message_data.sender,
+                word_count=word_count,
+                character_count=character_count,
+                processed_at=processed_at
+            )
+            self.db.add(db_message)
+            self.db.commit()
+            self.db.refresh(db_message)
+            return db_message
+        except IntegrityError:
+            self.db.rollback()
+            raise DuplicateError(f"Message with ID {message_data.message_id} already exists")
+
+    def create_messages(
+        self,
+        messages: List[MessageCreate],
+        word_counts: List[int],
+        character_counts: List[int],
+        processed_at
+    ) -> List[Optional[Message]]:
+        """
+        Crear varios mensajes en una sola transacción. Devuelve una lista paralela a
+        `messages` con None en los mensajes cuyo ID ya existe (en la base o antes en el lote).
+        """
+        existing = self._existing_message_ids([m.message_id for m in messages])
+        results: List[Optional[Message]] = []
+        for message_data, word_count, character_count in zip(messages, word_counts, character_counts):
+            if message_data.message_id in existing:
+                results.append(None)
+                continue
+            existing.add(message_data.message_id)
+            results.append(Message(
+                message_id=message_data.message_id,
+                session_id=message_data.session_id,
+                content=message_data.content,
+                timestamp=message_data.timestamp,
+                sender=message_data.sender,
+                word_count=word_count,
+                character_count=character_count,
+                processed_at=processed_at
+            ))
+
+        created = [m for m in results if m is not None]
+        try:
+            self.db.add_all(created)
+            self.db.commit()
+        except IntegrityError:
+            # Otra escritura concurrente ganó la carrera: insertar uno por uno
+            self.db.rollback()
+            return [
+                self._create_or_none(message_data, word_count, character_count, processed_at)
+                for message_data, word_count, character_count in zip(messages, word_counts, character_counts)
+            ]
+
+        # Recargar los mensajes creados con una consulta por trozo en lugar de un refresh por fila
+        created_ids = [m.message_id for m in created]
+        for i in range(0, len(created_ids), SQL_IN_CHUNK_SIZE):
+            self.db.query(Message).filter(
+                Message.message_id.in_(created_ids[i:i + SQL_IN_CHUNK_SIZE])
+            ).all()
+        return results
+
+    def get_messages_by_session(
+        self, 
+        session_id: str, 
+        sender: Optional[str] = None,
+        limit: int = 10, 
+        offset: int = 0
+    ) -> List[Message]:
+        """
+        Obtener mensajes por ID de sesión con filtrado y paginación opcionales.
+        """
+        query = self.db.query(Message).filter(Message.session_id == session_id)
+
+        if sender:
+            query = query.filter(Message.sender == sender)
+
+        messages = query.order_by(Message.timestamp.desc()).offset(offset).limit(limit).all()
+        return messages
+
+    def get_message_columns_by_session(
+        self,
+        session_id: str,
+        columns: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[tuple]:
+        """
+        Obtener solo las columnas indicadas de los mensajes de una sesión.
+        """
+        query = self.db.query(*[getattr(Message, column) for column in columns]).filter(
+            Message.session_id == session_id
+        )
+
+        if sender:
+            query = query.filter(Message.sender == sender)
+
+        rows = query.order_by(Message.timestamp.desc()).offset(offset).limit(limit).all()
+        return [tuple(row) for row in rows]
+
+    def get_latest_messages_by_sessions(
+        self,
+        session_ids: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, List[Message]]:
+        """
+        Obtener los últimos `limit` mensajes de cada sesión en una sola consulta,
+        numerando las filas con ROW_NUMBER() OVER (PARTITION BY session_id).
+        """
+        grouped: Dict[str, List[Message]] = {session_id: [] for session_id in session_ids}
+        if not session_ids:
+            return grouped
+
+        # Numerar solo los IDs (cubiertos por el índice session_id, timestamp)
+        # y cargar las filas completas únicamente para las que quedan dentro del límite
+        row_number = func.row_number().over(
+            partition_by=Message.session_id,
+            order_by=Message.timestamp.desc()
+        ).label("row_number")
+        ranked = self.db.query(Message.id.label("id"), row_number).filter(Message.session_id.in_(session_ids))
+        if sender:
+            ranked = ranked.filter(Message.sender == sender)
+        ranked = ranked.subquery()
+
+        messages = (
+            self.db.query(Message)
+            .join(ranked, Message.id == ranked.c.id)
+            .filter(ranked.c.row_number <= limit)
+            .order_by(Message.session_id, ranked.c.row_number)
+            .all()
+        )
+        for message in messages:
+            grouped[message.session_id].append(message)
+        return grouped
+
+    def _existing_message_ids(self, message_ids: List[str]) -> set:
+        existing = set()
+        for i in range(0, len(message_ids), SQL_IN_CHUNK_SIZE):
+            rows = self.db.query(Message.message_id).filter(
+                Message.message_id.in_(message_ids[i:i + SQL_IN_CHUNK_SIZE])
+            ).all()
+            existing.update(row.message_id for row in rows)
+        return existing
+
+    def _create_or_none(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> Optional[Message]:
+        try:
+            return self.create_message(message_data, word_count, character_count, processed_at)
+        except DuplicateError:
+            return None
+
+    def get_message_by_id(self, message_id: str) -> Optional[Message]:
+        """
+        Obtener un solo mensaje por su ID.
+        """
+        return self.db.query(Message).filter(Message.message_id == message_id).first()
+
+    def message_exists(self, message_id: str) -> bool:
+        """
+        Verificar si un mensaje existe por su ID.
+        """
+        return self.db.query(Message).filter(Message.message_id == message_id).first() is not None
+
+    def get_expired_session_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        """
+        Obtener sesiones cuyo último mensaje es anterior a cutoff.
+        """
+        rows = (
+            self.db.query(Message.session_id)
+            .group_by(Message.session_id)
+            .having(func.max(Message.timestamp) < cutoff)
+            .order_by(Message.session_id)
+            .limit(limit)
+            .all()
+        )
+        return [row.session_id for row in rows]
+
+    def get_all_messages_by_session_ids(self, session_ids: List[str]) -> List[Message]:
+        """
+        Obtener todos los mensajes de varias sesiones, sin paginación.
+        """
+        return (
+            self.db.query(Message)
+            .filter(Message.session_id.in_(session_ids))
+            .order_by(Message.session_id, Message.timestamp)
+            .all()
+        )
+
+    def archive_sessions(self, entries: List[dict], archived_at: datetime) -> int:
+        """
+        Registrar sesiones archivadas y eliminar de la tabla principal, en una sola
+        transacción, solo los mensajes escritos en el archivo. Cada entrada tiene
+        session_id, partition y message_ids; los mensajes que llegaron a la sesión
+        después de leerla permanecen en la tabla.
+        """
+        deleted = 0
+        try:
+            for entry in entries:
+                message_ids = entry["message_ids"]
+                session_deleted = 0
+                for i in range(0, len(message_ids), SQL_IN_CHUNK_SIZE):
+                    session_deleted += (
+                        self.db.query(Message)
+                        .filter(Message.message_id.in_(message_ids[i:i + SQL_IN_CHUNK_SIZE]))
+                        .delete(synchronize_session=False)
+                    )
+                self.db.add(ArchivedSession(
+                    session_id=entry["session_id"],
+                    partition=entry["partition"],
+                    message_count=session_deleted,
+                    archived_at=archived_at
+                ))
+                deleted += session_deleted
+            self.db.commit()
+            return deleted
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_archive_partitions(self, session_id: str) -> List[str]:
+        """
+        Obtener las particiones de archivo que contienen mensajes de una sesión.
+        """
+        rows = (
+            self.db.query(ArchivedSession.partition)
+            .filter(ArchivedSession.session_id == session_id)
+            .distinct()
+            .all()
+        )
+        return [row.partition for row in rows]
+
+    def incremental_vacuum(self, pages: int) -> None:
+        """
+        Liberar hasta `pages` páginas libres de SQLite. En otros motores no hace nada.
+        """
+        if self.db.get_bind().dialect.name != "sqlite":
+            return
+        self.db.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+        self.db.commit()
@@ -0,0 +1,117 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.models.message import MessageCreate
+
+
+class MessageStorage(ABC):
+    """
+    Interfaz de los backends de almacenamiento detrás de MessageRepository.
+
+    Los mensajes devueltos exponen los atributos de Message (message_id, session_id,
+    content, timestamp, sender, word_count, character_count, processed_at), con las
+    fechas como hora de Bogotá sin zona horaria.
+    """
+
+    @abstractmethod
+    def create_message(self, message_data: MessageCreate, word_count: int, character_count: int, processed_at) -> Any:
+        """
+        Crear un mensaje. Lanza DuplicateError si el ID ya existe.
+        """
+
+    @abstractmethod
+    def create_messages(
+        self,
+        messages: List[MessageCreate],
+        word_counts: List[int],
+        character_counts: List[int],
+        processed_at
+    ) -> List[Optional[Any]]:
+        """
+        Crear varios mensajes. Devuelve una lista paralela a `messages` con None
+        en los mensajes cuyo ID ya existe (en el almacenamiento o antes en el lote).
+        """
+
+    @abstractmethod
+    def get_messages_by_session(
+        self,
+        session_id: str,
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Any]:
+        """
+        Mensajes de una sesión, del más reciente al más antiguo, con filtro y paginación.
+        """
+
+    @abstractmethod
+    def get_message_columns_by_session(
+        self,
+        session_id: str,
+        columns: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[tuple]:
+        """
+        Igual que get_messages_by_session, pero devuelve solo `columns`, una tupla por mensaje.
+        """
+
+    @abstractmethod
+    def get_latest_messages_by_sessions(
+        self,
+        session_ids: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, List[Any]]:
+        """
+        Últimos `limit` mensajes de cada sesión, agrupados en el orden de `session_ids`.
+        """
+
+    @abstractmethod
+    def get_message_by_id(self, message_id: str) -> Optional[Any]:
+        """
+        Obtener un solo mensaje por su ID.
+        """
+
+    @abstractmethod
+    def message_exists(self, message_id: str) -> bool:
+        """
+        Verificar si un mensaje existe por su ID.
+        """
+
+    @abstractmethod
+    def get_expired_session_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        """
+        Sesiones cuyo último mensaje es anterior a cutoff, ordenadas por ID.
+        """
+
+    @abstractmethod
+    def get_all_messages_by_session_ids(self, session_ids: List[str]) -> List[Any]:
+        """
+        Todos los mensajes de varias sesiones, ordenados por sesión y timestamp.
+        """
+
+    @abstractmethod
+    def archive_sessions(self, entries: List[dict], archived_at: datetime) -> int:
+        """
+        Registrar sesiones archivadas y eliminar solo los mensajes de `message_ids` de
+        cada entrada. Devuelve los mensajes eliminados.
+        """
+
+    @abstractmethod
+    def get_archive_partitions(self, session_id: str) -> List[str]:
+        """
+        Particiones de archivo que contienen mensajes de una sesión.
+        """
+
+    def incremental_vacuum(self, pages: int) -> None:
+        """
+        Compactar el almacenamiento después de archivar. Por defecto no hace nada.
+        """
+
+    def close(self) -> None:
+        """
+        Liberar recursos al terminar una petición. Por defecto no hace nada.
+        """
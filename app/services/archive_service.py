@@ -0,0 +1,119 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Callable, Optional, Union
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+
+from app.repository.message_repository import MessageRepository
+from app.repository.storage import MessageStorage
+from app.repository.archive_repository import ArchiveRepository
+from app.core.config import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_DIR,
+    ARCHIVE_INTERVAL_SECONDS,
+    RETENTION_DAYS,
+    VACUUM_PAGES_PER_RUN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveService:
+    def __init__(self, db: Union[Session, MessageStorage], archive: Optional[ArchiveRepository] = None):
+        self.repository = MessageRepository(db)
+        self.archive = archive or ArchiveRepository(ARCHIVE_DIR)
+
+    def archive_expired(
+        self,
+        retention_days: int = RETENTION_DAYS,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        vacuum_pages: int = VACUUM_PAGES_PER_RUN,
+        now: Optional[datetime] = None
+    ) -> int:
+        """
+        Mover al archivo las sesiones inactivas por más de retention_days días,
+        en lotes de batch_size sesiones, y compactar la tabla después de cada lote.
+        Devuelve el número de mensajes archivados.
+        """
+        if retention_days <= 0:
+            return 0
+
+        # Los timestamps se almacenan como hora de Bogotá sin zona horaria
+        now = now or datetime.now(ZoneInfo("America/Bogota"))
+        if now.tzinfo is not None:
+            now = now.astimezone(ZoneInfo("America/Bogota")).replace(tzinfo=None)
+        cutoff = now - timedelta(days=retention_days)
+
+        archived = 0
+        while True:
+            session_ids = self.repository.get_expired_session_ids(cutoff, batch_size)
+            if not session_ids:
+                break
+
+            messages = self.repository.get_all_messages_by_session_ids(session_ids)
+            entries = []
+            for session_id, group in groupby(messages, key=lambda m: m.session_id):
+                session_messages = list(group)
+                partition = self.archive.partition_for(session_messages[-1].timestamp.date())
+                self.archive.write_partition(partition, session_messages)
+                entries.append({
+                    "session_id": session_id,
+                    "partition": partition,
+                    "message_ids": [m.message_id for m in session_messages],
+                })
+
+            # Los archivos ya están en disco antes de borrar las filas
+            archived += self.repository.archive_sessions(entries, archived_at=now)
+            self.repository.incremental_vacuum(vacuum_pages)
+
+        return archived
+
+
+class MessageArchiver:
+    """
+    Ejecuta ArchiveService.archive_expired periódicamente en un hilo en segundo plano.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Union[Session, MessageStorage]],
+        interval_seconds: int = ARCHIVE_INTERVAL_SECONDS,
+        archive: Optional[ArchiveRepository] = None
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.archive = archive
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="message-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> int:
+        db = self.session_factory()
+        try:
+            return ArchiveService(db, self.archive).archive_expired()
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                archived = self.run_once()
+                if archived:
+                    logger.info("Archived %d expired messages", archived)
+            except Exception:
+                logger.exception("Message archiver run failed")
+            self._stop.wait(self.interval_seconds)
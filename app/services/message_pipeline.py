@@ -0,0 +1,146 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from concurrent.futures import Executor
+from itertools import accumulate, repeat
+from typing import Callable, List, Optional, Sequence
+
+from app.models.message import MessageCreate
+from app.core.config import INAPPROPRIATE_WORDS, BATCH_PARALLEL_MIN_SIZE, BATCH_CHUNK_SIZE
+from app.core.errors import ApiError, ValidationError
+
+
+class MessageBatch:
+    """
+    Lote de mensajes que recorre el pipeline. Los resultados de cada etapa se
+    guardan en listas paralelas a `messages`; `errors[i]` marca un mensaje rechazado.
+    """
+
+    def __init__(self, messages: Sequence[MessageCreate]):
+        self.messages = list(messages)
+        self.contents = [message.content for message in self.messages]
+        self.errors: List[Optional[ApiError]] = [None] * len(self.messages)
+        self.word_counts: List[int] = []
+        self.character_counts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def reject(self, index: int, error: ApiError) -> None:
+        # Se conserva el primer error, igual que en el procesamiento individual
+        if self.errors[index] is None:
+            self.errors[index] = error
+
+    def accepted_indexes(self) -> List[int]:
+        return [i for i, error in enumerate(self.errors) if error is None]
+
+
+class BatchStage(ABC):
+    """
+    Etapa del pipeline. Las subclases operan sobre el lote completo y pueden
+    usar `executor` para repartir trabajo pesado de CPU.
+    """
+
+    @abstractmethod
+    def apply(self, batch: MessageBatch, executor: Optional[Executor] = None) -> None:
+        """
+        Procesar el lote; rechazar mensajes con batch.reject.
+        """
+
+
+class ContentFilterStage(BatchStage):
+    """
+    Rechaza mensajes con palabras inapropiadas buscando cada término una sola vez
+    sobre el contenido concatenado de todo el lote.
+    """
+
+    def __init__(self, words: Sequence[str] = INAPPROPRIATE_WORDS):
+        self.words = list(words)
+
+    def apply(self, batch: MessageBatch, executor: Optional[Executor] = None) -> None:
+        matches = _run_chunked(find_inappropriate_words, batch.contents, executor, self.words)
+        for index, word in enumerate(matches):
+            if word is not None:
+                batch.reject(index, ValidationError(
+                    "Message contains inappropriate content",
+                    f"The word '{word}' is not allowed"
+                ))
+
+
+class MetadataStage(BatchStage):
+    """
+    Calcula word_count y character_count de todos los mensajes en una pasada.
+    """
+
+    def apply(self, batch: MessageBatch, executor: Optional[Executor] = None) -> None:
+        batch.word_counts = _run_chunked(count_words, batch.contents, executor)
+        batch.character_counts = list(map(len, batch.contents))
+
+
+class MessagePipeline:
+    def __init__(self, stages: Sequence[BatchStage]):
+        self.stages = list(stages)
+
+    def run(self, batch: MessageBatch, executor: Optional[Executor] = None) -> MessageBatch:
+        for stage in self.stages:
+            stage.apply(batch, executor)
+        return batch
+
+
+def default_stages() -> List[BatchStage]:
+    return [ContentFilterStage(), MetadataStage()]
+
+
+def count_words(contents: Sequence[str]) -> List[int]:
+    """
+    Número de palabras de cada contenido, equivalente a len(content.strip().split()).
+    """
+    return list(map(len, map(str.split, contents)))
+
+
+def find_inappropriate_words(contents: Sequence[str], words: Sequence[str]) -> List[Optional[str]]:
+    """
+    Para cada contenido, la primera palabra de `words` (en orden de la lista) que
+    aparece en él, o None. Equivale a MessageService._validate_content por mensaje.
+    """
+    lowered = [content.lower() for content in contents]
+    # El separador no forma parte de ningún término, así que ninguna coincidencia cruza mensajes
+    buffer = "\x00".join(lowered)
+    starts = list(accumulate((len(text) + 1 for text in lowered[:-1]), initial=0))
+    found: List[Optional[str]] = [None] * len(contents)
+    remaining = len(contents)
+
+    for word in words:
+        if not remaining:
+            break
+        position = buffer.find(word)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            if found[index] is None:
+                found[index] = word
+                remaining -= 1
+            # Saltar al siguiente mensaje: el resto de este ya no cambia el resultado
+            next_start = starts[index + 1] if index + 1 < len(starts) else len(buffer)
+            position = buffer.find(word, next_start)
+
+    return found
+
+
+def _run_chunked(
+    func: Callable,
+    contents: List[str],
+    executor: Optional[Executor],
+    *args
+) -> list:
+    """
+    Ejecutar `func` sobre el lote completo, o repartido en trozos en `executor`
+    cuando el lote supera BATCH_PARALLEL_MIN_SIZE. `func` debe ser una función
+    de módulo para poder enviarse a un ProcessPoolExecutor.
+    """
+    if executor is None or len(contents) < BATCH_PARALLEL_MIN_SIZE:
+        return func(contents, *args)
+
+    chunks = [contents[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(contents), BATCH_CHUNK_SIZE)]
+    results = []
+    for chunk_result in executor.map(func, chunks, *(repeat(arg, len(chunks)) for arg in args)):
+        results.extend(chunk_result)
+    return results
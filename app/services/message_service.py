@@ -1,16 +1,21 @@
+from concurrent.futures import Executor
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from sqlalchemy.orm import Session
 
-from app.models.message import MessageCreate, MessageResponse, MessageMetadata, Message
+from app.models.message import MessageCreate, MessageResponse, MessageMetadata, Message, MESSAGE_FIELDS, METADATA_FIELDS
 from app.repository.message_repository import MessageRepository
-from app.core.config import INAPPROPRIATE_WORDS
-from app.core.errors import ValidationError
+from app.repository.storage import MessageStorage
+from app.repository.archive_repository import ArchiveRepository
+from app.core.config import INAPPROPRIATE_WORDS, ARCHIVE_DIR, MAX_QUERY_SESSIONS
+from app.core.errors import ApiError, DuplicateError, ValidationError
+from app.services.message_pipeline import BatchStage, MessageBatch, MessagePipeline, default_stages
 
 
 class MessageService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, MessageStorage], archive: Optional[ArchiveRepository] = None):
         self.repository = MessageRepository(db)
+        self.archive = archive or ArchiveRepository(ARCHIVE_DIR)
         self.db = db
 
     def process_message(self, message_data: MessageCreate) -> MessageResponse:
@@ -49,27 +54,206 @@ class MessageService:
             metadata=metadata
         )
 
+    def process_batch(
+        self,
+        messages: Sequence[MessageCreate],
+        extra_stages: Sequence[BatchStage] = (),
+        executor: Optional[Executor] = None
+    ) -> List[Union[MessageResponse, ApiError]]:
+        """
+        Procesar un lote de mensajes con el pipeline de etapas y almacenarlos en una
+        sola transacción. Devuelve, por cada mensaje y en el mismo orden, el
+        MessageResponse o el ApiError que habría producido process_message.
+        Las etapas por defecto (filtro de contenido y metadatos) siempre se ejecutan;
+        `extra_stages` se ejecutan después de ellas. `executor` reparte las etapas
+        de CPU en lotes grandes.
+        """
+        pipeline = MessagePipeline(default_stages() + list(extra_stages))
+        batch = pipeline.run(MessageBatch(messages), executor)
+        processed_at = datetime.now(timezone.utc)
+
+        accepted = batch.accepted_indexes()
+        db_messages = self.repository.create_messages(
+            messages=[batch.messages[i] for i in accepted],
+            word_counts=[batch.word_counts[i] for i in accepted],
+            character_counts=[batch.character_counts[i] for i in accepted],
+            processed_at=processed_at
+        )
+
+        results: List[Union[MessageResponse, ApiError]] = list(batch.errors)
+        for index, db_message in zip(accepted, db_messages):
+            if db_message is None:
+                results[index] = DuplicateError(
+                    f"Message with ID {batch.messages[index].message_id} already exists"
+                )
+                continue
+            results[index] = MessageResponse(
+                message_id=db_message.message_id,
+                session_id=db_message.session_id,
+                content=db_message.content,
+                timestamp=db_message.timestamp,
+                sender=db_message.sender,
+                metadata=MessageMetadata(
+                    word_count=batch.word_counts[index],
+                    character_count=batch.character_counts[index],
+                    processed_at=processed_at
+                )
+            )
+        return results
+
     def get_messages_by_session(
         self, 
         session_id: str, 
         sender: Optional[str] = None,
         limit: int = 10, 
-        offset: int = 0
+        offset: int = 0,
+        include_archived: bool = False
     ) -> List[MessageResponse]:
         """
         Recuperar mensajes por session_id con paginación y filtro opcional por remitente.
+        Con include_archived, también se leen los mensajes movidos al archivo.
         """
         if sender and sender not in ["user", "system"]:
             raise ValidationError("Sender must be 'user' or 'system'")
 
-        messages = self.repository.get_messages_by_session(
+        partitions = self.repository.get_archive_partitions(session_id) if include_archived else []
+        if not partitions:
+            messages = self.repository.get_messages_by_session(
+                session_id=session_id,
+                sender=sender,
+                limit=limit,
+                offset=offset
+            )
+            return [self._convert_to_response(msg) for msg in messages]
+
+        # Combinar filas activas y archivadas antes de paginar
+        hot_messages = self.repository.get_messages_by_session(
             session_id=session_id,
             sender=sender,
-            limit=limit,
-            offset=offset
+            limit=offset + limit,
+            offset=0
         )
+        responses = {msg.message_id: self._convert_to_response(msg) for msg in hot_messages}
+        for record in self.archive.read_session(partitions, session_id):
+            if sender and record["sender"] != sender:
+                continue
+            responses.setdefault(record["message_id"], self._convert_record_to_response(record))
 
-        return [self._convert_to_response(msg) for msg in messages]
+        ordered = sorted(responses.values(), key=lambda msg: msg.timestamp, reverse=True)
+        return ordered[offset:offset + limit]
+
+    def get_message_fields_by_session(
+        self,
+        session_id: str,
+        fields: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        include_archived: bool = False
+    ) -> Tuple[List[str], List[tuple]]:
+        """
+        Recuperar solo los campos indicados de los mensajes de una sesión. Devuelve la
+        lista de columnas (con "metadata" expandido) y una tupla por mensaje en ese orden.
+        """
+        columns = self._resolve_fields(fields)
+
+        if sender and sender not in ["user", "system"]:
+            raise ValidationError("Sender must be 'user' or 'system'")
+
+        partitions = self.repository.get_archive_partitions(session_id) if include_archived else []
+        if not partitions:
+            rows = self.repository.get_message_columns_by_session(
+                session_id=session_id,
+                columns=columns,
+                sender=sender,
+                limit=limit,
+                offset=offset
+            )
+            return columns, rows
+
+        # message_id y timestamp se consultan siempre para combinar y ordenar; se quitan al final
+        query_columns = columns + [c for c in ("message_id", "timestamp") if c not in columns]
+        id_index = query_columns.index("message_id")
+        timestamp_index = query_columns.index("timestamp")
+
+        hot_rows = self.repository.get_message_columns_by_session(
+            session_id=session_id,
+            columns=query_columns,
+            sender=sender,
+            limit=offset + limit,
+            offset=0
+        )
+        rows = {row[id_index]: row for row in hot_rows}
+        for record in self.archive.read_session(partitions, session_id):
+            if sender and record["sender"] != sender:
+                continue
+            rows.setdefault(record["message_id"], self._project_record(record, query_columns))
+
+        ordered = sorted(rows.values(), key=lambda row: row[timestamp_index], reverse=True)
+        return columns, [row[:len(columns)] for row in ordered[offset:offset + limit]]
+
+    def get_latest_messages_by_sessions(
+        self,
+        session_ids: List[str],
+        sender: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, List[MessageResponse]]:
+        """
+        Recuperar los últimos `limit` mensajes de varias sesiones, agrupados por session_id
+        en el orden solicitado.
+        """
+        if sender and sender not in ["user", "system"]:
+            raise ValidationError("Sender must be 'user' or 'system'")
+
+        # Eliminar duplicados conservando el orden
+        session_ids = list(dict.fromkeys(session_ids))
+        if not session_ids:
+            raise ValidationError("At least one session_id is required")
+        if len(session_ids) > MAX_QUERY_SESSIONS:
+            raise ValidationError(
+                "Too many sessions requested",
+                f"A maximum of {MAX_QUERY_SESSIONS} session_ids is allowed"
+            )
+
+        grouped = self.repository.get_latest_messages_by_sessions(
+            session_ids=session_ids,
+            sender=sender,
+            limit=limit
+        )
+
+        return {
+            session_id: [self._convert_to_response(msg) for msg in messages]
+            for session_id, messages in grouped.items()
+        }
+
+    def _resolve_fields(self, fields: List[str]) -> List[str]:
+        """
+        Validar los campos solicitados y expandir "metadata", sin duplicados.
+        """
+        columns: List[str] = []
+        for field in fields:
+            expanded = METADATA_FIELDS if field == "metadata" else [field]
+            for column in expanded:
+                if column not in MESSAGE_FIELDS:
+                    raise ValidationError(
+                        f"Unknown field '{field}'",
+                        f"Allowed fields: {', '.join(MESSAGE_FIELDS + ['metadata'])}"
+                    )
+                if column not in columns:
+                    columns.append(column)
+        if not columns:
+            raise ValidationError("At least one field is required")
+        return columns
+
+    def _project_record(self, record: dict, columns: List[str]) -> tuple:
+        """
+        Tomar del registro del archivo solo las columnas indicadas, con los mismos
+        tipos que devuelve el almacenamiento.
+        """
+        return tuple(
+            datetime.fromisoformat(record[column]) if column in ("timestamp", "processed_at") else record[column]
+            for column in columns
+        )
 
     def _validate_content(self, content: str) -> None:
         """
@@ -100,4 +284,23 @@ class MessageService:
             timestamp=db_message.timestamp,
             sender=db_message.sender,
             metadata=metadata
-        )
\ No newline at end of file
+        )
+
+    def _convert_record_to_response(self, record: dict) -> MessageResponse:
+        """
+        convertir un registro del archivo en un MessageResponse
+        """
+        metadata = MessageMetadata(
+            word_count=record["word_count"],
+            character_count=record["character_count"],
+            processed_at=record["processed_at"]
+        )
+
+        return MessageResponse(
+            message_id=record["message_id"],
+            session_id=record["session_id"],
+            content=record["content"],
+            timestamp=record["timestamp"],
+            sender=record["sender"],
+            metadata=metadata
+        )
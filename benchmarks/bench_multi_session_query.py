@@ -0,0 +1,115 @@
+"""
+Comparar la consulta de múltiples sesiones (una consulta con ROW_NUMBER)
+contra N llamadas a get_messages_by_session, una por sesión, tanto en el
+servicio como a través de HTTP (N GET contra un POST /api/messages/query).
+
+Uso:
+    python benchmarks/bench_multi_session_query.py --sessions 50 --messages 200 --limit 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from app.api.messages import router
+from app.db.database import get_db
+from app.models.message import Base, MessageCreate
+from app.services.message_service import MessageService
+
+
+def seed(service: MessageService, sessions: int, messages: int) -> list:
+    session_ids = [f"bench-session-{s}" for s in range(sessions)]
+    start = datetime(2025, 9, 25, 10, 0, 0, tzinfo=timezone.utc)
+    batch = [
+        MessageCreate(
+            message_id=f"{session_id}-{m}",
+            session_id=session_id,
+            content=f"Mensaje de prueba número {m}",
+            timestamp=start + timedelta(seconds=m),
+            sender="user" if m % 2 == 0 else "system"
+        )
+        for session_id in session_ids
+        for m in range(messages)
+    ]
+    service.process_batch(batch)
+    return session_ids
+
+
+def measure(func, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=200, help="Mensajes por sesión")
+    parser.add_argument("--limit", type=int, default=10, help="Mensajes por sesión a recuperar")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        service = MessageService(db)
+        session_ids = seed(service, args.sessions, args.messages)
+
+        def n_calls():
+            return {
+                session_id: service.get_messages_by_session(session_id=session_id, limit=args.limit)
+                for session_id in session_ids
+            }
+
+        def single_query():
+            return service.get_latest_messages_by_sessions(session_ids=session_ids, limit=args.limit)
+
+        baseline = n_calls()
+        windowed = single_query()
+        assert {k: [m.message_id for m in v] for k, v in baseline.items()} == \
+            {k: [m.message_id for m in v] for k, v in windowed.items()}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        client = TestClient(app)
+
+        def http_n_calls():
+            for session_id in session_ids:
+                client.get(f"/api/messages/{session_id}", params={"limit": args.limit}).raise_for_status()
+
+        def http_single_query():
+            client.post(
+                "/api/messages/query",
+                json={"session_ids": session_ids, "limit": args.limit}
+            ).raise_for_status()
+
+        results = {
+            f"Servicio: N llamadas ({args.sessions})": measure(n_calls, args.repeat),
+            "Servicio: ROW_NUMBER (1 consulta)": measure(single_query, args.repeat),
+            f"HTTP: N GET ({args.sessions})": measure(http_n_calls, args.repeat),
+            "HTTP: POST /api/messages/query": measure(http_single_query, args.repeat),
+        }
+        db.close()
+
+    print(f"{args.sessions} sesiones x {args.messages} mensajes, limit={args.limit}, repeat={args.repeat}")
+    for name, timings in results.items():
+        print(f"{name:<40} mediana {statistics.median(timings):8.2f} ms   mín {min(timings):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Generador de carga HTTP de extremo a extremo para la API de mensajes.
+
+Levanta la aplicación de main.py con uvicorn en un puerto local (en un
+directorio temporal, para no tocar ./messages.db), reproduce una mezcla de
+escenarios a una tasa objetivo con httpx.AsyncClient y guarda un reporte JSON
+con throughput, percentiles de latencia (p50/p95/p99/p99.9), histograma y
+tasa de errores por escenario.
+
+La carga es de lazo abierto: cada petición se programa en un instante fijo
+según la tasa objetivo y su latencia se mide desde ese instante, así las
+demoras del servidor no reducen la carga ni se ocultan en los percentiles.
+
+Uso:
+    python benchmarks/load_test.py --mix write-heavy --rate 200 --duration 30
+    python benchmarks/load_test.py --mix ingest=0.2,poll=0.7,paginate=0.1 --rate 100
+    python benchmarks/load_test.py --mix deep-pagination --rate 50 --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__) + "/..")
+
+# Límites superiores (ms) de los intervalos del histograma
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf]
+PERCENTILES = [50, 95, 99, 99.9]
+
+# Mezclas predefinidas, utilizables como valor de --mix
+PRESETS = {
+    "write-heavy": "ingest=0.9,poll=0.1",
+    "poll-heavy": "ingest=0.1,poll=0.9",
+    "deep-pagination": "paginate=0.9,ingest=0.1",
+    "mixed": "ingest=0.5,poll=0.4,paginate=0.1",
+}
+
+
+class Scenarios:
+    """
+    Escenarios disponibles. Cada uno devuelve (método, ruta, parámetros, cuerpo).
+    """
+
+    names = ("ingest", "poll", "paginate")
+
+    def __init__(self, seed_sessions: int, seed_messages: int, rng: random.Random):
+        self.seed_sessions = seed_sessions
+        self.seed_messages = seed_messages
+        self.rng = rng
+        self._ids = itertools.count()
+        self._run_id = f"{os.getpid()}-{int(time.time())}"
+
+    def session_ids(self) -> List[str]:
+        return [f"load-session-{s}" for s in range(self.seed_sessions)]
+
+    def ingest(self):
+        n = next(self._ids)
+        return "POST", "/api/messages", None, {
+            "message_id": f"load-{self._run_id}-{n}",
+            "session_id": f"load-ingest-{n % 1000}",
+            "content": f"Mensaje de carga número {n}",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "sender": "user" if n % 2 == 0 else "system",
+        }
+
+    def poll(self):
+        session_id = self.rng.choice(self.session_ids())
+        return "GET", f"/api/messages/{session_id}", {"limit": 10}, None
+
+    def paginate(self):
+        # Páginas de la segunda mitad de la sesión, donde el OFFSET es más costoso
+        session_id = self.rng.choice(self.session_ids())
+        offset = self.rng.randrange(self.seed_messages // 2, max(self.seed_messages // 2 + 1, self.seed_messages - 10))
+        return "GET", f"/api/messages/{session_id}", {"limit": 10, "offset": offset}, None
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    value = PRESETS.get(value, value)
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in Scenarios.names:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {name}")
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("La suma de los pesos debe ser positiva")
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def seed(client: httpx.AsyncClient, scenarios: Scenarios, concurrency: int) -> None:
+    """
+    Crear las sesiones que usan los escenarios de lectura.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(session_id: str, m: int):
+        async with semaphore:
+            response = await client.post("/api/messages", json={
+                "message_id": f"{session_id}-{scenarios._run_id}-{m}",
+                "session_id": session_id,
+                "content": f"Mensaje inicial {m}",
+                "timestamp": datetime(2025, 9, 25, 10, 0, tzinfo=timezone.utc).isoformat(),
+                "sender": "user" if m % 2 == 0 else "system",
+            })
+            # Sin datos precargados, poll y paginate medirían sesiones vacías
+            response.raise_for_status()
+
+    await asyncio.gather(*(
+        post(session_id, m)
+        for session_id in scenarios.session_ids()
+        for m in range(scenarios.seed_messages)
+    ))
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    scenarios: Scenarios,
+    mix: Dict[str, float],
+    rate: float,
+    duration: float,
+    max_in_flight: int
+) -> Dict[str, List[dict]]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[dict]] = {name: [] for name in names}
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks = []
+
+    async def fire(name: str, scheduled: float):
+        method, path, params, body = getattr(scenarios, name)()
+        async with semaphore:
+            try:
+                response = await client.request(method, path, params=params, json=body)
+                ok = 200 <= response.status_code < 300
+                status = response.status_code
+            except httpx.HTTPError as e:
+                ok, status = False, type(e).__name__
+        samples[name].append({
+            "latency_ms": (time.perf_counter() - scheduled) * 1000,
+            "ok": ok,
+            "status": status,
+        })
+
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = scenarios.rng.choices(names, weights)[0]
+        tasks.append(asyncio.create_task(fire(name, scheduled)))
+    await asyncio.gather(*tasks)
+    samples["_elapsed"] = time.perf_counter() - start
+    return samples
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(samples: List[dict], elapsed: float) -> dict:
+    latencies = sorted(sample["latency_ms"] for sample in samples)
+    errors = [sample for sample in samples if not sample["ok"]]
+    histogram = []
+    lower = 0
+    for upper in HISTOGRAM_BUCKETS_MS:
+        count = sum(1 for value in latencies if lower <= value < upper)
+        histogram.append({"upper_ms": None if upper == math.inf else upper, "count": count})
+        lower = upper
+    error_statuses: Dict[str, int] = {}
+    for sample in errors:
+        key = str(sample["status"])
+        error_statuses[key] = error_statuses.get(key, 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "errors_by_status": error_statuses,
+        "latency_ms": {
+            **{f"p{p:g}": percentile(latencies, p) for p in PERCENTILES},
+            "min": latencies[0] if latencies else None,
+            "max": latencies[-1] if latencies else None,
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+        },
+        "histogram": histogram,
+    }
+
+
+def build_report(samples: Dict[str, List[dict]], args, mix: Dict[str, float]) -> dict:
+    elapsed = samples.pop("_elapsed")
+    all_samples = [sample for scenario in samples.values() for sample in scenario]
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "mix": mix,
+            "rate": args.rate,
+            "duration": args.duration,
+            "max_in_flight": args.max_in_flight,
+            "seed_sessions": args.seed_sessions,
+            "seed_messages": args.seed_messages,
+            "url": args.url,
+        },
+        "elapsed_s": elapsed,
+        "overall": summarize(all_samples, elapsed),
+        "scenarios": {name: summarize(scenario, elapsed) for name, scenario in samples.items()},
+    }
+
+
+def print_report(report: dict) -> None:
+    rows = [("total", report["overall"])] + list(report["scenarios"].items())
+    print(f"{'escenario':<10} {'peticiones':>10} {'rps':>8} {'errores':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'p99.9':>8}  (ms)")
+    for name, summary in rows:
+        latency = summary["latency_ms"]
+        cells = [f"{latency[key]:8.2f}" if latency[key] is not None else f"{'-':>8}"
+                 for key in ("p50", "p95", "p99", "p99.9")]
+        print(f"{name:<10} {summary['requests']:>10} {summary['throughput_rps']:>8.1f} "
+              f"{summary['error_rate']:>7.2%} {' '.join(cells)}")
+
+
+async def main_async(args) -> dict:
+    mix = args.mix
+    scenarios = Scenarios(args.seed_sessions, args.seed_messages, random.Random(args.seed))
+    server = None
+    workdir = None
+    url = args.url
+    if url is None:
+        workdir = tempfile.TemporaryDirectory()
+        port = free_port()
+        server = start_server(port, workdir.name)
+        url = f"http://127.0.0.1:{port}"
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+            await wait_until_ready(client)
+            if {"poll", "paginate"} & set(mix):
+                await seed(client, scenarios, args.max_in_flight)
+            samples = await run_load(client, scenarios, mix, args.rate, args.duration, args.max_in_flight)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if workdir is not None:
+            workdir.cleanup()
+
+    return build_report(samples, args, mix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("mixed"),
+                        help=f"Mezcla predefinida ({', '.join(PRESETS)}) o pesos por escenario, "
+                             "p. ej. ingest=0.5,poll=0.4,paginate=0.1 (default: mixed)")
+    parser.add_argument("--rate", type=float, default=100, help="Peticiones por segundo objetivo")
+    parser.add_argument("--duration", type=float, default=10, help="Duración en segundos")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Máximo de peticiones concurrentes")
+    parser.add_argument("--seed-sessions", type=int, default=20, help="Sesiones precargadas para lecturas")
+    parser.add_argument("--seed-messages", type=int, default=200, help="Mensajes por sesión precargada")
+    parser.add_argument("--timeout", type=float, default=10, help="Timeout por petición en segundos")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador aleatorio")
+    parser.add_argument("--url", default=None, help="Usar un servidor existente en lugar de iniciar main.py")
+    parser.add_argument("--output", default=None, help="Ruta del reporte JSON (default: load_report_<fecha>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    output = args.output or f"load_report_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Reporte guardado en {output}")
+
+
+if __name__ == "__main__":
+    main()
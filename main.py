@@ -1,18 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel
 
 from app.api.messages import router as messages_router
-from app.db.database import create_tables
-from app.core.config import API_TITLE, API_DESCRIPTION, API_VERSION
+from app.db.database import create_tables, open_db, get_memory_storage
+from app.core.config import API_TITLE, API_DESCRIPTION, API_VERSION, RETENTION_DAYS, STORAGE_BACKEND
+from app.services.archive_service import MessageArchiver
 
 # Crear tablas de la base de datos al iniciar
 create_tables()
 
+# Archivador de sesiones expiradas (desactivado con RETENTION_DAYS = 0)
+archiver = MessageArchiver(open_db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RETENTION_DAYS > 0:
+        archiver.start()
+    yield
+    archiver.stop()
+    if STORAGE_BACKEND == "memory":
+        get_memory_storage().shutdown()
+
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
-    version=API_VERSION
+    version=API_VERSION,
+    lifespan=lifespan
 )
 
 # Incluir routers
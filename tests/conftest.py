@@ -16,4 +16,13 @@ def db_session():
     Base.metadata.create_all(bind=engine)
     session = TestingSessionLocal()
     yield session
-    session.close()
\ No newline at end of file
+    session.close()
+
+@pytest.fixture(params=["sqlalchemy", "memory"])
+def repository(request, db_session):
+    """Repositorio sobre cada backend de almacenamiento; las pruebas que lo usan corren en ambos."""
+    from app.repository.message_repository import MessageRepository
+    from app.repository.memory_storage import InMemoryMessageStorage
+    if request.param == "memory":
+        return MessageRepository(InMemoryMessageStorage())
+    return MessageRepository(db_session)
@@ -39,4 +39,72 @@ def test_create_message_invalid_sender():
         "sender": "otro"
     }
     response = client.post("/api/messages", json=data)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_query_messages_multiple_sessions():
+    for i, session_id in enumerate(["session-q1", "session-q1", "session-q2"]):
+        client.post("/api/messages", json={
+            "message_id": f"msg-query-{i}",
+            "session_id": session_id,
+            "content": "Hola mundo",
+            "timestamp": f"2025-09-25T10:0{i}:00Z",
+            "sender": "user"
+        })
+    response = client.post("/api/messages/query", json={
+        "session_ids": ["session-q1", "session-q2", "session-q3"],
+        "limit": 1
+    })
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [m["message_id"] for m in data["session-q1"]] == ["msg-query-1"]
+    assert [m["message_id"] for m in data["session-q2"]] == ["msg-query-2"]
+    assert data["session-q3"] == []
+
+def test_query_messages_requires_sessions():
+    response = client.post("/api/messages/query", json={"session_ids": []})
+    assert response.status_code == 400
+
+
+def _create_projection_messages():
+    for i in range(2):
+        client.post("/api/messages", json={
+            "message_id": f"msg-fields-{i}",
+            "session_id": "session-fields",
+            "content": "Hola mundo",
+            "timestamp": f"2025-09-25T10:0{i}:00Z",
+            "sender": "user"
+        })
+
+def test_get_messages_with_fields():
+    _create_projection_messages()
+    full = client.get("/api/messages/session-fields").json()["data"]
+    response = client.get("/api/messages/session-fields", params={"fields": "message_id,timestamp,word_count"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data == [
+        {"message_id": m["message_id"], "timestamp": m["timestamp"], "metadata": {"word_count": m["metadata"]["word_count"]}}
+        for m in full
+    ]
+
+def test_get_messages_columnar():
+    _create_projection_messages()
+    response = client.get("/api/messages/session-fields", params={"fields": "message_id,sender", "format": "columnar"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["data"] == {"message_id": ["msg-fields-1", "msg-fields-0"], "sender": ["user", "user"]}
+    assert body["pagination"]["total"] == 2
+
+    all_fields = client.get("/api/messages/session-fields", params={"format": "columnar"}).json()["data"]
+    assert list(all_fields) == ["message_id", "session_id", "content", "timestamp", "sender", "word_count", "character_count", "processed_at"]
+
+def test_get_messages_unknown_field():
+    response = client.get("/api/messages/session-fields", params={"fields": "message_id,password"})
+    assert response.status_code == 400
+    response = client.get("/api/messages/session-fields", params={"format": "xml"})
+    assert response.status_code == 422
+
+def test_get_messages_openapi_documents_all_shapes():
+    schema = client.get("/openapi.json").json()
+    response = schema["paths"]["/api/messages/{session_id}"]["get"]["responses"]["200"]
+    refs = {option["$ref"].rsplit("/", 1)[-1] for option in response["content"]["application/json"]["schema"]["anyOf"]}
+    assert refs == {"MessagesListResponse", "ProjectedMessagesListResponse", "ColumnarMessagesListResponse"}
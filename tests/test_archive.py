@@ -0,0 +1,137 @@
+import pytest
+from sqlalchemy.orm import Session
+from datetime import datetime
+from app.models.message import Message, MessageCreate, ArchivedSession
+from app.repository.archive_repository import ArchiveRepository
+from app.services.archive_service import ArchiveService
+from app.services.message_service import MessageService
+
+@pytest.fixture(scope="function")
+def archive(tmp_path):
+    return ArchiveRepository(str(tmp_path / "archive"))
+
+def _add(service, message_id, session_id, timestamp, sender="user", content="Hola mundo"):
+    service.process_message(MessageCreate(
+        message_id=message_id,
+        session_id=session_id,
+        content=content,
+        timestamp=timestamp,
+        sender=sender
+    ))
+
+NOW = datetime(2025, 9, 25, 12, 0, 0)
+
+def test_archive_expired_moves_idle_sessions(db_session, archive):
+    service = MessageService(db_session, archive)
+    _add(service, "old-1", "sess-old", "2025-08-01T10:00:00")
+    _add(service, "old-2", "sess-old", "2025-08-02T10:00:00", sender="system")
+    _add(service, "new-1", "sess-new", "2025-09-24T10:00:00")
+
+    archived = ArchiveService(db_session, archive).archive_expired(retention_days=30, now=NOW)
+
+    assert archived == 2
+    assert db_session.query(Message).filter(Message.session_id == "sess-old").count() == 0
+    assert db_session.query(Message).filter(Message.session_id == "sess-new").count() == 1
+    entry = db_session.query(ArchivedSession).one()
+    assert entry.session_id == "sess-old"
+    assert entry.partition == "2025-08-02"
+    assert entry.message_count == 2
+
+def test_archive_expired_keeps_sessions_with_recent_activity(repository, archive):
+    service = MessageService(repository.backend, archive)
+    _add(service, "mix-1", "sess-mix", "2025-08-01T10:00:00")
+    _add(service, "mix-2", "sess-mix", "2025-09-20T10:00:00")
+
+    archived = ArchiveService(repository.backend, archive).archive_expired(retention_days=30, now=NOW)
+
+    assert archived == 0
+    assert len(service.get_messages_by_session("sess-mix")) == 2
+
+def test_archive_expired_in_batches(repository, archive):
+    service = MessageService(repository.backend, archive)
+    for i in range(5):
+        _add(service, f"batch-{i}", f"sess-batch-{i}", "2025-08-01T10:00:00")
+
+    archived = ArchiveService(repository.backend, archive).archive_expired(retention_days=30, batch_size=2, now=NOW)
+
+    assert archived == 5
+    for i in range(5):
+        assert service.get_messages_by_session(f"sess-batch-{i}") == []
+        assert repository.get_archive_partitions(f"sess-batch-{i}") == ["2025-08-01"]
+
+def test_archive_disabled_with_zero_retention(repository, archive):
+    service = MessageService(repository.backend, archive)
+    _add(service, "keep-1", "sess-keep", "2020-01-01T10:00:00")
+    assert ArchiveService(repository.backend, archive).archive_expired(retention_days=0, now=NOW) == 0
+    assert len(service.get_messages_by_session("sess-keep")) == 1
+
+def test_get_messages_include_archived(repository, archive):
+    service = MessageService(repository.backend, archive)
+    _add(service, "arc-1", "sess-arc", "2025-08-01T10:00:00", content="Primer mensaje")
+    _add(service, "arc-2", "sess-arc", "2025-08-02T10:00:00", sender="system")
+    ArchiveService(repository.backend, archive).archive_expired(retention_days=30, now=NOW)
+    _add(service, "arc-3", "sess-arc", "2025-09-25T10:00:00")
+
+    assert [m.message_id for m in service.get_messages_by_session("sess-arc")] == ["arc-3"]
+
+    messages = service.get_messages_by_session("sess-arc", include_archived=True)
+    assert [m.message_id for m in messages] == ["arc-3", "arc-2", "arc-1"]
+    assert messages[2].content == "Primer mensaje"
+    assert messages[2].metadata.word_count == 2
+
+    only_user = service.get_messages_by_session("sess-arc", sender="user", include_archived=True)
+    assert [m.message_id for m in only_user] == ["arc-3", "arc-1"]
+
+    page = service.get_messages_by_session("sess-arc", limit=1, offset=1, include_archived=True)
+    assert [m.message_id for m in page] == ["arc-2"]
+
+def test_archive_keeps_messages_inserted_after_read(repository, archive):
+    service = MessageService(repository.backend, archive)
+    _add(service, "race-old", "sess-race", "2025-08-01T10:00:00")
+    archive_service = ArchiveService(repository.backend, archive)
+
+    # Simular un mensaje que llega entre la lectura de la sesión y el borrado
+    read_messages = archive_service.repository.get_all_messages_by_session_ids
+    def read_then_insert(session_ids):
+        messages = read_messages(session_ids)
+        _add(service, "race-new", "sess-race", "2025-09-25T11:00:00")
+        return messages
+    archive_service.repository.get_all_messages_by_session_ids = read_then_insert
+
+    archived = archive_service.archive_expired(retention_days=30, now=NOW)
+
+    assert archived == 1
+    assert [m.message_id for m in service.get_messages_by_session("sess-race")] == ["race-new"]
+    messages = service.get_messages_by_session("sess-race", include_archived=True)
+    assert [m.message_id for m in messages] == ["race-new", "race-old"]
+    if isinstance(repository.db, Session):
+        assert repository.db.query(ArchivedSession).one().message_count == 1
+
+def test_read_session_skips_other_sessions_in_partition(db_session, archive):
+    service = MessageService(db_session, archive)
+    _add(service, "part-1", "sess-1", "2025-08-01T10:00:00")
+    _add(service, "part-10", "sess-10", "2025-08-01T11:00:00", content="mención de \"sess-1\"")
+    _add(service, "part-ñ", "sess-ñ\"x", "2025-08-01T12:00:00")
+    ArchiveService(db_session, archive).archive_expired(retention_days=30, now=NOW)
+
+    assert [r["message_id"] for r in archive.read_session(["2025-08-01"], "sess-1")] == ["part-1"]
+    assert [r["message_id"] for r in archive.read_session(["2025-08-01"], "sess-ñ\"x")] == ["part-ñ"]
+
+def test_get_message_fields_include_archived(repository, archive):
+    service = MessageService(repository.backend, archive)
+    _add(service, "fld-1", "sess-fld", "2025-08-01T10:00:00", content="Primer mensaje")
+    _add(service, "fld-2", "sess-fld", "2025-08-02T10:00:00", sender="system")
+    ArchiveService(repository.backend, archive).archive_expired(retention_days=30, now=NOW)
+    _add(service, "fld-3", "sess-fld", "2025-09-25T10:00:00")
+
+    columns, rows = service.get_message_fields_by_session(
+        "sess-fld", ["sender", "word_count", "timestamp"], include_archived=True
+    )
+    full = service.get_messages_by_session("sess-fld", include_archived=True)
+    assert columns == ["sender", "word_count", "timestamp"]
+    assert rows == [(m.sender, m.metadata.word_count, m.timestamp) for m in full]
+
+    columns, rows = service.get_message_fields_by_session(
+        "sess-fld", ["content"], sender="user", limit=1, offset=1, include_archived=True
+    )
+    assert rows == [("Primer mensaje",)]
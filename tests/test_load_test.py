@@ -0,0 +1,46 @@
+import argparse
+import pytest
+from benchmarks.load_test import PRESETS, parse_mix, percentile, summarize
+
+def test_parse_mix_expands_presets():
+    assert parse_mix("write-heavy") == {"ingest": 0.9, "poll": 0.1}
+    for name in PRESETS:
+        assert sum(parse_mix(name).values()) == pytest.approx(1.0)
+
+def test_parse_mix_custom_weights():
+    assert parse_mix("ingest=2, poll") == {"ingest": 2.0, "poll": 1.0}
+
+def test_parse_mix_rejects_unknown_scenario():
+    with pytest.raises(argparse.ArgumentTypeError, match="Escenario desconocido: delete"):
+        parse_mix("ingest=0.5,delete=0.5")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("ingest=0")
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99.9) == 100
+    assert percentile([7], 50) == 7
+    assert percentile([], 50) is None
+
+def test_summarize_histogram_and_errors():
+    samples = [
+        {"latency_ms": 0.5, "ok": True, "status": 200},
+        {"latency_ms": 1.0, "ok": True, "status": 200},
+        {"latency_ms": 7.0, "ok": False, "status": 500},
+        {"latency_ms": 9000.0, "ok": False, "status": "ReadTimeout"},
+    ]
+    summary = summarize(samples, elapsed=2.0)
+
+    counts = {bucket["upper_ms"]: bucket["count"] for bucket in summary["histogram"]}
+    assert counts[1] == 1
+    assert counts[2] == 1
+    assert counts[10] == 1
+    assert counts[None] == 1
+    assert sum(counts.values()) == 4
+    assert summary["throughput_rps"] == 2.0
+    assert summary["error_rate"] == 0.5
+    assert summary["errors_by_status"] == {"500": 1, "ReadTimeout": 1}
+    assert summary["latency_ms"]["p50"] == 1.0
+    assert summary["latency_ms"]["max"] == 9000.0
@@ -100,4 +100,52 @@ def test_message_exists(db_session):
     )
     repo.create_message(data, 1, 6, datetime(2025, 9, 25, 10, 0, 1, tzinfo=ZoneInfo("America/Bogota")))
     assert repo.message_exists("msg-5") is True
-    assert repo.message_exists("not-exists") is False
\ No newline at end of file
+    assert repo.message_exists("not-exists") is False
+
+def test_get_latest_messages_by_sessions(db_session):
+    repo = MessageRepository(db_session)
+    for session_id, count in (("sess-a", 3), ("sess-b", 1)):
+        for i in range(count):
+            data = MessageCreate(
+                message_id=f"{session_id}-{i}",
+                session_id=session_id,
+                content="Hola",
+                timestamp=datetime(2025, 9, 25, 10, i, 0, tzinfo=ZoneInfo("America/Bogota")),
+                sender="user" if i % 2 == 0 else "system"
+            )
+            repo.create_message(data, 1, 4, datetime(2025, 9, 25, 11, 0, 0, tzinfo=ZoneInfo("America/Bogota")))
+
+    grouped = repo.get_latest_messages_by_sessions(["sess-a", "sess-b", "sess-empty"], limit=2)
+    assert list(grouped) == ["sess-a", "sess-b", "sess-empty"]
+    assert [m.message_id for m in grouped["sess-a"]] == ["sess-a-2", "sess-a-1"]
+    assert [m.message_id for m in grouped["sess-b"]] == ["sess-b-0"]
+    assert grouped["sess-empty"] == []
+
+    only_user = repo.get_latest_messages_by_sessions(["sess-a"], sender="user", limit=10)
+    assert [m.message_id for m in only_user["sess-a"]] == ["sess-a-2", "sess-a-0"]
+
+
+def test_get_message_columns_by_session_selects_only_requested_columns(db_session):
+    from sqlalchemy import event
+    repo = MessageRepository(db_session)
+    data = MessageCreate(
+        message_id="msg-cols",
+        session_id="sess-cols",
+        content="Contenido largo",
+        timestamp=datetime(2025, 9, 25, 10, 0, 0, tzinfo=ZoneInfo("America/Bogota")),
+        sender="user"
+    )
+    repo.create_message(data, 2, 15, datetime(2025, 9, 25, 10, 0, 1, tzinfo=ZoneInfo("America/Bogota")))
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        rows = repo.get_message_columns_by_session("sess-cols", ["message_id", "sender"])
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    assert rows == [("msg-cols", "user")]
+    select_clause = statements[-1].split("FROM")[0]
+    assert "content" not in select_clause
+    assert "message_id" in select_clause
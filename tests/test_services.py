@@ -1,9 +1,14 @@
 import pytest
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.models.message import Base, MessageCreate
+from app.models.message import Base, MessageCreate, MessageResponse
+from app.repository.memory_storage import InMemoryMessageStorage
+from app.services import message_pipeline
+from app.services.message_pipeline import BatchStage
 from app.services.message_service import MessageService
-from app.core.errors import DuplicateError, NotFoundError
+from app.core.config import INAPPROPRIATE_WORDS
+from app.core.errors import ApiError, DuplicateError, NotFoundError, ValidationError
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -14,8 +19,8 @@ def db_session():
     yield session
     session.close()
 
-def test_process_message_success(db_session):
-    service = MessageService(db_session)
+def test_process_message_success(repository):
+    service = MessageService(repository.backend)
     data = MessageCreate(
         message_id="msg-10",
         session_id="sess-service",
@@ -28,8 +33,8 @@ def test_process_message_success(db_session):
     assert result.metadata.word_count == 3
     assert result.metadata.character_count == len("Hola mundo prueba")
 
-def test_process_message_duplicate(db_session):
-    service = MessageService(db_session)
+def test_process_message_duplicate(repository):
+    service = MessageService(repository.backend)
     data = MessageCreate(
         message_id="msg-dup-service",
         session_id="sess-service",
@@ -41,8 +46,8 @@ def test_process_message_duplicate(db_session):
     with pytest.raises(DuplicateError):
         service.process_message(data)
 
-def test_get_messages_by_session(db_session):
-    service = MessageService(db_session)
+def test_get_messages_by_session(repository):
+    service = MessageService(repository.backend)
     data1 = MessageCreate(
         message_id="msg-20",
         session_id="sess-get",
@@ -65,7 +70,93 @@ def test_get_messages_by_session(db_session):
     assert len(only_user) == 1
     assert only_user[0].sender == "user"
 
-def test_get_messages_by_session_empty(db_session):
-    service = MessageService(db_session)
+def test_get_messages_by_session_empty(repository):
+    service = MessageService(repository.backend)
     messages = service.get_messages_by_session(session_id="empty-session")
-    assert messages == []
\ No newline at end of file
+    assert messages == []
+
+def _batch_inputs():
+    return [
+        MessageCreate(message_id="b-1", session_id="sess-batch", content="Hola mundo", timestamp="2025-09-25T10:00:00Z", sender="user"),
+        MessageCreate(message_id="b-2", session_id="sess-batch", content="Esto es SPAM puro", timestamp="2025-09-25T10:01:00Z", sender="user"),
+        MessageCreate(message_id="b-3", session_id="sess-batch", content="  varios   espacios\ty tabs ", timestamp="2025-09-25T10:02:00Z", sender="system"),
+        MessageCreate(message_id="b-1", session_id="sess-batch", content="Repetido", timestamp="2025-09-25T10:03:00Z", sender="user"),
+        MessageCreate(message_id="b-4", session_id="sess-batch", content="hate and scam", timestamp="2025-09-25T10:04:00Z", sender="user"),
+        MessageCreate(message_id="b-5", session_id="sess-batch", content="Ünïcödé İstanbul virus", timestamp="2025-09-25T10:05:00Z", sender="user"),
+    ]
+
+def _single_results(service, messages):
+    results = []
+    for message in messages:
+        try:
+            results.append(service.process_message(message))
+        except ApiError as e:
+            results.append(e)
+    return results
+
+def _comparable(result):
+    if isinstance(result, ApiError):
+        return (type(result), result.code, result.message, result.details)
+    return result.model_dump(exclude={"metadata": {"processed_at"}})
+
+def _fresh_backend(repository):
+    """Backend vacío del mismo tipo que el del repositorio."""
+    if isinstance(repository.db, InMemoryMessageStorage):
+        return InMemoryMessageStorage()
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def test_process_batch_matches_single_path(repository):
+    expected = _single_results(MessageService(_fresh_backend(repository)), _batch_inputs())
+
+    results = MessageService(repository.backend).process_batch(_batch_inputs())
+
+    assert [_comparable(r) for r in results] == [_comparable(r) for r in expected]
+    assert isinstance(results[1], ValidationError)
+    assert results[1].details == "The word 'spam' is not allowed"
+    assert results[4].details == "The word 'scam' is not allowed"
+    assert isinstance(results[3], DuplicateError)
+
+def test_process_batch_duplicate_of_stored_message(repository):
+    service = MessageService(repository.backend)
+    service.process_message(_batch_inputs()[0])
+    results = service.process_batch(_batch_inputs()[:1])
+    assert isinstance(results[0], DuplicateError)
+
+def test_process_batch_custom_stage(repository):
+    class RejectSystemStage(BatchStage):
+        def apply(self, batch, executor=None):
+            for i, message in enumerate(batch.messages):
+                if message.sender == "system":
+                    batch.reject(i, ValidationError("System messages are not allowed"))
+
+    service = MessageService(repository.backend)
+    results = service.process_batch(_batch_inputs(), extra_stages=[RejectSystemStage()])
+    assert results[2].message == "System messages are not allowed"
+    assert len(service.get_messages_by_session("sess-batch", limit=100)) == 1
+    assert results[0].metadata.word_count == 2
+
+def test_batch_stage_requires_apply():
+    class IncompleteStage(BatchStage):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStage()
+
+def test_process_batch_with_process_pool(repository, monkeypatch):
+    monkeypatch.setattr(message_pipeline, "BATCH_PARALLEL_MIN_SIZE", 2)
+    monkeypatch.setattr(message_pipeline, "BATCH_CHUNK_SIZE", 2)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = MessageService(repository.backend).process_batch(_batch_inputs(), executor=executor)
+    assert [type(r) for r in results] == [
+        MessageResponse, ValidationError, MessageResponse, DuplicateError, ValidationError, ValidationError
+    ]
+    assert results[2].metadata.word_count == 4
+
+def test_find_inappropriate_words_uses_list_order():
+    contents = ["threat and spam", "", "nada", "hackathon", "violence"]
+    assert message_pipeline.find_inappropriate_words(contents, INAPPROPRIATE_WORDS) == [
+        "spam", None, None, "hack", "violence"
+    ]
+    assert message_pipeline.count_words(["  a b  ", "", "uno"]) == [2, 0, 1]
@@ -0,0 +1,188 @@
+import pytest
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from app.models.message import MessageCreate
+from app.repository.memory_storage import InMemoryMessageStorage
+from app.repository.message_repository import MessageRepository
+from app.services.message_service import MessageService
+from app.core.errors import DuplicateError
+
+PROCESSED_AT = datetime(2025, 9, 25, 12, 0, 0, tzinfo=ZoneInfo("UTC"))
+
+def _message(message_id, session_id, minute, sender="user", content="Hola mundo"):
+    return MessageCreate(
+        message_id=message_id,
+        session_id=session_id,
+        content=content,
+        timestamp=f"2025-09-25T10:{minute:02d}:00Z",
+        sender=sender
+    )
+
+def _seed(repository):
+    for i in range(5):
+        repository.create_message(_message(f"a-{i}", "sess-a", i, "user" if i % 2 == 0 else "system"), 2, 10, PROCESSED_AT)
+    repository.create_message(_message("b-0", "sess-b", 30), 2, 10, PROCESSED_AT)
+
+def test_create_message_normalizes_to_bogota(repository):
+    created = repository.create_message(_message("m-1", "sess-1", 0), 2, 10, PROCESSED_AT)
+    stored = repository.get_message_by_id("m-1")
+    for message in (created, stored):
+        assert message.timestamp == datetime(2025, 9, 25, 5, 0, 0)
+        assert message.processed_at == datetime(2025, 9, 25, 7, 0, 0)
+        assert message.sender == "user"
+        assert message.word_count == 2
+
+def test_create_message_duplicate(repository):
+    repository.create_message(_message("dup", "sess-1", 0), 2, 10, PROCESSED_AT)
+    with pytest.raises(DuplicateError):
+        repository.create_message(_message("dup", "sess-1", 1), 2, 10, PROCESSED_AT)
+
+def test_create_messages_marks_duplicates(repository):
+    repository.create_message(_message("x-0", "sess-x", 0), 1, 1, PROCESSED_AT)
+    results = repository.create_messages(
+        [_message("x-0", "sess-x", 1), _message("x-1", "sess-x", 2), _message("x-1", "sess-x", 3)],
+        [1, 1, 1], [1, 1, 1], PROCESSED_AT
+    )
+    assert results[0] is None and results[2] is None
+    assert results[1].message_id == "x-1"
+    assert repository.message_exists("x-1")
+
+def test_get_messages_by_session_order_filter_pagination(repository):
+    _seed(repository)
+    assert [m.message_id for m in repository.get_messages_by_session("sess-a")] == ["a-4", "a-3", "a-2", "a-1", "a-0"]
+    assert [m.message_id for m in repository.get_messages_by_session("sess-a", limit=2, offset=1)] == ["a-3", "a-2"]
+    assert [m.message_id for m in repository.get_messages_by_session("sess-a", sender="user", offset=1)] == ["a-2", "a-0"]
+    assert repository.get_messages_by_session("sess-a", offset=10) == []
+    assert repository.get_messages_by_session("missing") == []
+
+def test_get_latest_messages_by_sessions(repository):
+    _seed(repository)
+    grouped = repository.get_latest_messages_by_sessions(["sess-b", "sess-a", "missing"], sender="user", limit=2)
+    assert {k: [m.message_id for m in v] for k, v in grouped.items()} == {
+        "sess-b": ["b-0"], "sess-a": ["a-4", "a-2"], "missing": []
+    }
+    assert list(grouped) == ["sess-b", "sess-a", "missing"]
+
+def test_get_message_by_id_and_exists(repository):
+    _seed(repository)
+    assert repository.get_message_by_id("b-0").session_id == "sess-b"
+    assert repository.get_message_by_id("nope") is None
+    assert repository.message_exists("a-1") is True
+    assert repository.message_exists("nope") is False
+
+def test_expired_sessions_and_archive(repository):
+    _seed(repository)
+    cutoff = datetime(2025, 9, 25, 5, 10, 0)
+    assert repository.get_expired_session_ids(cutoff, limit=10) == ["sess-a"]
+    assert [m.message_id for m in repository.get_all_messages_by_session_ids(["sess-a"])] == [f"a-{i}" for i in range(5)]
+
+    deleted = repository.archive_sessions(
+        [{"session_id": "sess-a", "partition": "2025-09-25", "message_ids": [f"a-{i}" for i in range(5)]}],
+        archived_at=datetime(2025, 10, 30, 0, 0, 0)
+    )
+    assert deleted == 5
+    assert repository.get_messages_by_session("sess-a") == []
+    assert repository.message_exists("a-0") is False
+    assert repository.get_archive_partitions("sess-a") == ["2025-09-25"]
+    assert repository.get_archive_partitions("sess-b") == []
+    repository.incremental_vacuum(10)
+
+def test_archive_sessions_deletes_only_listed_messages(repository):
+    _seed(repository)
+    deleted = repository.archive_sessions(
+        [{"session_id": "sess-a", "partition": "2025-09-25", "message_ids": ["a-0", "a-1"]}],
+        archived_at=datetime(2025, 10, 30, 0, 0, 0)
+    )
+    assert deleted == 2
+    assert [m.message_id for m in repository.get_messages_by_session("sess-a")] == ["a-4", "a-3", "a-2"]
+    assert repository.message_exists("a-0") is False
+
+def test_service_on_memory_backend():
+    service = MessageService(InMemoryMessageStorage())
+    results = service.process_batch([_message("s-0", "sess-s", 0), _message("s-1", "sess-s", 1, content="spam")])
+    assert results[0].metadata.word_count == 2
+    assert results[1].code == "INVALID_FORMAT"
+    assert [m.message_id for m in service.get_messages_by_session("sess-s")] == ["s-0"]
+
+def test_memory_storage_replays_log_and_snapshot(tmp_path):
+    storage = InMemoryMessageStorage(str(tmp_path), snapshot_every=3)
+    repository = MessageRepository(storage)
+    _seed(repository)  # 6 operaciones: snapshots en segundo plano
+    repository.create_message(_message("c-0", "sess-c", 40), 2, 10, PROCESSED_AT)
+    repository.archive_sessions([{"session_id": "sess-b", "partition": "2025-09-25", "message_ids": ["b-0"]}], datetime(2025, 10, 30))
+    storage.wait_for_snapshot()
+
+    reloaded = MessageRepository(InMemoryMessageStorage(str(tmp_path)))
+    assert [m.message_id for m in reloaded.get_messages_by_session("sess-a")] == ["a-4", "a-3", "a-2", "a-1", "a-0"]
+    assert reloaded.get_message_by_id("c-0").timestamp == datetime(2025, 9, 25, 5, 40, 0)
+    assert reloaded.message_exists("b-0") is False
+    assert reloaded.get_archive_partitions("sess-b") == ["2025-09-25"]
+
+def test_memory_storage_ignores_torn_log_line(tmp_path):
+    storage = InMemoryMessageStorage(str(tmp_path))
+    storage.create_message(_message("t-0", "sess-t", 0), 2, 10, PROCESSED_AT)
+    with open(tmp_path / InMemoryMessageStorage.LOG_FILE, "a", encoding="utf-8") as fh:
+        fh.write('{"op": "create", "messa')
+
+    reloaded = InMemoryMessageStorage(str(tmp_path))
+    assert reloaded.message_exists("t-0")
+    reloaded.create_message(_message("t-1", "sess-t", 1), 2, 10, PROCESSED_AT)
+    assert InMemoryMessageStorage(str(tmp_path)).message_exists("t-1")
+
+def test_memory_snapshot_does_not_block_reads(tmp_path):
+    storage = InMemoryMessageStorage(str(tmp_path), snapshot_every=2)
+    writing = threading.Event()
+    release = threading.Event()
+    write_snapshot = storage._write_snapshot
+    def slow_write_snapshot(messages, archived):
+        writing.set()
+        release.wait(5)
+        write_snapshot(messages, archived)
+    storage._write_snapshot = slow_write_snapshot
+
+    storage.create_message(_message("s-0", "sess-s", 0), 2, 10, PROCESSED_AT)
+    storage.create_message(_message("s-1", "sess-s", 1), 2, 10, PROCESSED_AT)
+    assert writing.wait(5)
+
+    # Con el snapshot detenido a mitad de escritura, lecturas y escrituras siguen
+    done = threading.Event()
+    def read_and_write():
+        storage.get_messages_by_session("sess-s")
+        storage.create_message(_message("s-2", "sess-s", 2), 2, 10, PROCESSED_AT)
+        done.set()
+    threading.Thread(target=read_and_write).start()
+    assert done.wait(2)
+    assert [m.message_id for m in storage.get_messages_by_session("sess-s")] == ["s-2", "s-1", "s-0"]
+
+    release.set()
+    storage.wait_for_snapshot()
+    assert not (tmp_path / InMemoryMessageStorage.SEALED_LOG_FILE).exists()
+    reloaded = InMemoryMessageStorage(str(tmp_path))
+    assert [m.message_id for m in reloaded.get_messages_by_session("sess-s")] == ["s-2", "s-1", "s-0"]
+
+def test_memory_storage_replays_sealed_log_after_failed_snapshot(tmp_path):
+    storage = InMemoryMessageStorage(str(tmp_path), snapshot_every=2)
+    def failing_write_snapshot(messages, archived):
+        raise OSError("disk full")
+    storage._write_snapshot = failing_write_snapshot
+
+    for i in range(3):
+        storage.create_message(_message(f"f-{i}", "sess-f", i), 2, 10, PROCESSED_AT)
+    storage.wait_for_snapshot()
+    storage.create_message(_message("f-3", "sess-f", 3), 2, 10, PROCESSED_AT)  # sella de nuevo
+    storage.wait_for_snapshot()
+    assert (tmp_path / InMemoryMessageStorage.SEALED_LOG_FILE).exists()
+
+    reloaded = InMemoryMessageStorage(str(tmp_path))
+    assert [m.message_id for m in reloaded.get_messages_by_session("sess-f")] == ["f-3", "f-2", "f-1", "f-0"]
+    assert not (tmp_path / InMemoryMessageStorage.SEALED_LOG_FILE).exists()
+
+def test_get_message_columns_by_session(repository):
+    _seed(repository)
+    rows = repository.get_message_columns_by_session("sess-a", ["message_id", "sender", "timestamp"], sender="system")
+    assert rows == [
+        ("a-3", "system", datetime(2025, 9, 25, 5, 3, 0)),
+        ("a-1", "system", datetime(2025, 9, 25, 5, 1, 0)),
+    ]
+    assert repository.get_message_columns_by_session("sess-a", ["message_id"], limit=1, offset=4) == [("a-0",)]